@@ -10,12 +10,13 @@ __author__ = "Anzen Team"
 __email__ = "team@anzen.dev"
 
 from .agent import AnzenAgent
-from .models import AgentRequest, AgentResponse, TaskPlan, TaskStep
+from .models import AgentRequest, AgentResponse, StepStatus, TaskPlan, TaskStep
 
 __all__ = [
     "AnzenAgent",
     "AgentRequest",
     "AgentResponse",
+    "StepStatus",
     "TaskPlan",
     "TaskStep",
 ]
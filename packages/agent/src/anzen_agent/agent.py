@@ -5,54 +5,76 @@ AI workflow agent with safety guardrails integration.
 Implements a 2-step workflow: (1) plan → (2) execute with external APIs.
 """
 
-import json
+import asyncio
+import hashlib
 import logging
-import uuid
-from typing import Any, Dict, List, Optional
+import re
+import secrets
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 
 import httpx
-from fastapi import APIRouter, HTTPException
-
-# Try to import OpenAI, handle if not available
-try:
-    import openai
-
-    OPENAI_AVAILABLE = True
-except Exception as e:
-    OPENAI_AVAILABLE = False
-
-    # Mock OpenAI client
-    class MockOpenAI:
-        def __init__(self, api_key):
-            pass
-
-        class chat:
-            class completions:
-                @staticmethod
-                def create(*args, **kwargs):
-                    class MockResponse:
-                        choices = [
-                            type(
-                                "obj",
-                                (object,),
-                                {
-                                    "message": type(
-                                        "obj", (object,), {"content": "Mock response"}
-                                    )()
-                                },
-                            )
-                        ]
-
-                    return MockResponse()
-
-    openai = type("module", (), {"OpenAI": MockOpenAI})()
-
-from .models import AgentRequest, AgentResponse, TaskPlan, TaskStep
+import openai
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from .http import get_client
+from .llm_cache import LLMCache
+from .models import AgentRequest, AgentResponse, StepStatus, TaskPlan, TaskStep
 from .safety_client import SafetyClient
+from .stream_json import StreamJSON
 from .tools import WeatherTool, WikipediaTool
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundaries at which streamed output is flushed through the gateway
+_SENTENCE_END = re.compile(r"[.!?](?=\s)|\n")
+
+_NL = "\n"
+
+# Prompt templates are built once; only the request-specific parts vary
+_PLAN_TMPL = """
+You are a helpful AI assistant that creates task plans. Given a user request, create a step-by-step plan.
+
+Available tools:
+- Wikipedia: Search for factual information
+- Weather: Get current weather for locations
+
+User request: {prompt}
+
+Create a JSON plan with this structure:
+{{
+    "steps": [
+        {{"step": 1, "action": "search_wikipedia", "description": "Search for information about X"}},
+        {{"step": 2, "action": "get_weather", "description": "Get weather for location Y"}},
+        {{"step": 3, "action": "synthesize", "description": "Combine information and provide response"}}
+    ],
+    "estimated_time": 30,
+    "complexity": "low"
+}}
+
+Only include steps that are needed. Use "search_wikipedia" for factual info, "get_weather" for weather, and "synthesize" to combine results.
+"""
+
+_SYNTH_TMPL = """
+Based on the user's request: "{prompt}"
+
+Available information:
+{results}
+
+Provide a helpful, comprehensive response that addresses the user's request using the available information.
+"""
+
+# Naive step-argument extraction: a capitalised place name (or failing that
+# the next word) after a location preposition, and the topic after "about"
+_LOC_RE = re.compile(r"\b(?i:in|at|for)\s+([A-Z][\w-]*(?:\s+[A-Z][\w-]*)?|[\w-]+)")
+_ABOUT_RE = re.compile(r"\babout\s+(.+)$", re.IGNORECASE)
+
+
+def _sse_event(payload: Dict[str, Any]) -> str:
+    """Format a payload as a Server-Sent Events data frame."""
+    return f"data: {orjson.dumps(payload).decode()}\n\n"
+
 
 class AnzenAgent:
     """Anzen AI Agent main class implementing Plan → Execute workflow."""
@@ -62,6 +84,7 @@ class AnzenAgent:
         gateway_url: str,
         openai_api_key: str,
         gateway_api_key: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
     ):
         self.gateway_url = gateway_url
         self.openai_api_key = openai_api_key
@@ -69,20 +92,25 @@ class AnzenAgent:
         self.router = APIRouter()
 
         # Initialize components
-        self.safety_client = SafetyClient(gateway_url, gateway_api_key)
+        self.http_client = http_client or get_client()
+        self.safety_client = SafetyClient(
+            gateway_url, gateway_api_key, client=self.http_client
+        )
 
         # Initialize OpenAI client with error handling
         try:
-            self.openai_client = openai.OpenAI(api_key=openai_api_key)
+            self.openai_client = openai.AsyncOpenAI(api_key=openai_api_key)
             logger.info("OpenAI client initialized")
         except Exception as e:
             logger.warning(f"OpenAI client initialization failed: {e}, using mock")
-            self.openai_client = openai.OpenAI(api_key="mock")
+            self.openai_client = openai.AsyncOpenAI(api_key="mock")
+
+        self.llm_cache = LLMCache(self.openai_client)
 
         # Initialize tools with error handling
         try:
-            self.wikipedia_tool = WikipediaTool()
-            self.weather_tool = WeatherTool()
+            self.wikipedia_tool = WikipediaTool(client=self.http_client)
+            self.weather_tool = WeatherTool(client=self.http_client)
             logger.info("External tools initialized")
         except Exception as e:
             logger.warning(f"Tools initialization failed: {e}")
@@ -91,6 +119,16 @@ class AnzenAgent:
 
         self._setup_routes()
 
+    @property
+    def endpoints(self) -> List[str]:
+        """Upstream URLs this agent calls, for connection warm-up."""
+        urls = [f"{self.safety_client.gateway_url}/health"]
+        if self.wikipedia_tool is not None:
+            urls.append(self.wikipedia_tool.api_url)
+        if self.weather_tool is not None:
+            urls.extend([self.weather_tool.geocoding_url, self.weather_tool.base_url])
+        return urls
+
     async def _safety_check_input(
         self, text: str, route: str = "private:agent"
     ) -> Dict[str, Any]:
@@ -139,49 +177,84 @@ class AnzenAgent:
                 "risk_level": "low",
             }
 
-    async def _generate_plan(self, prompt: str) -> TaskPlan:
-        """Generate a task plan using OpenAI (Step 1: Plan)."""
-        try:
-            planning_prompt = f"""
-You are a helpful AI assistant that creates task plans. Given a user request, create a step-by-step plan.
-
-Available tools:
-- Wikipedia: Search for factual information
-- Weather: Get current weather for locations
-
-User request: {prompt}
-
-Create a JSON plan with this structure:
-{{
-    "steps": [
-        {{"step": 1, "action": "search_wikipedia", "description": "Search for information about X"}},
-        {{"step": 2, "action": "get_weather", "description": "Get weather for location Y"}},
-        {{"step": 3, "action": "synthesize", "description": "Combine information and provide response"}}
-    ],
-    "estimated_time": 30,
-    "complexity": "low"
-}}
+    async def _chat_completion(
+        self,
+        prompt: str,
+        temperature: float,
+        on_delta: Optional[Callable[[str], None]] = None,
+        semantic_text: Optional[str] = None,
+    ) -> str:
+        """Run a single-message chat completion, served from cache when possible.
+
+        When ``on_delta`` is given the completion is streamed and each content
+        delta is passed to it as it arrives. Cache hits are returned whole
+        without invoking the callback. ``semantic_text`` opts the call into
+        near-match reuse and should be the bare user request, never the
+        templated prompt; without it only exact repeats are served from cache.
+        """
+        model = "gpt-4o-mini"
+        messages = [{"role": "user", "content": prompt}]
+
+        async def compute() -> str:
+            if on_delta is not None:
+                parts = []
+                async for delta in self._stream_chat_completion(prompt, temperature):
+                    parts.append(delta)
+                    on_delta(delta)
+                return "".join(parts)
+
+            response = await self.openai_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+            )
+            return response.choices[0].message.content
+
+        if not self.llm_cache.cacheable(temperature):
+            return await compute()
+
+        key = LLMCache.make_key(model, messages, temperature)
+        return await self.llm_cache.get_or_compute(
+            key, compute, text=semantic_text, scope=f"{model}:{temperature}"
+        )
+
+    async def _generate_plan(
+        self, prompt: str, step_queue: Optional[asyncio.Queue] = None
+    ) -> TaskPlan:
+        """Generate a task plan using OpenAI (Step 1: Plan).
+
+        The plan is streamed and each step is parsed as soon as it is complete.
+        If ``step_queue`` is given, steps are put on it as they arrive, followed
+        by a ``None`` sentinel, so execution can start before planning ends.
+        """
+        steps: List[TaskStep] = []
+        parser = StreamJSON(array_key="steps")
+
+        def emit(raw_steps: List[Dict[str, Any]]):
+            for raw_step in raw_steps:
+                step = TaskStep(
+                    step=raw_step["step"],
+                    action=raw_step["action"],
+                    description=raw_step["description"],
+                )
+                steps.append(step)
+                if step_queue is not None:
+                    step_queue.put_nowait(step)
 
-Only include steps that are needed. Use "search_wikipedia" for factual info, "get_weather" for weather, and "synthesize" to combine results.
-"""
+        try:
+            planning_prompt = _PLAN_TMPL.format_map({"prompt": prompt})
 
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": planning_prompt}],
+            content = await self._chat_completion(
+                planning_prompt,
                 temperature=0.1,
+                on_delta=lambda delta: emit(parser.push(delta)),
+                semantic_text=prompt,
             )
+            if not parser.consumed:
+                # Served from the cache, so nothing was streamed
+                emit(parser.push(content))
 
-            plan_json = json.loads(response.choices[0].message.content)
-
-            steps = [
-                TaskStep(
-                    step=step["step"],
-                    action=step["action"],
-                    description=step["description"],
-                    status="pending",
-                )
-                for step in plan_json["steps"]
-            ]
+            plan_json = parser.get()
 
             return TaskPlan(
                 steps=steps,
@@ -191,78 +264,63 @@ Only include steps that are needed. Use "search_wikipedia" for factual info, "ge
 
         except Exception as e:
             logger.error(f"Plan generation failed: {e}")
-            # Fallback plan
-            return TaskPlan(
-                steps=[
-                    TaskStep(
-                        step=1,
-                        action="synthesize",
-                        description="Process the request directly",
-                        status="pending",
-                    )
-                ],
-                estimated_time=15,
-                complexity="low",
-            )
+            # Fallback plan: keep any steps already dispatched, but make sure
+            # the request still gets answered
+            if not any(step.action == "synthesize" for step in steps):
+                emit(
+                    [
+                        {
+                            "step": len(steps) + 1,
+                            "action": "synthesize",
+                            "description": "Process the request directly",
+                        }
+                    ]
+                )
+            return TaskPlan(steps=steps, estimated_time=15, complexity="low")
+
+        finally:
+            if step_queue is not None:
+                step_queue.put_nowait(None)
 
     async def _execute_plan(self, plan: TaskPlan, original_prompt: str) -> str:
         """Execute the task plan (Step 2: Execute)."""
-        results = []
-
+        step_queue: asyncio.Queue = asyncio.Queue()
         for step in plan.steps:
-            try:
-                step.status = "running"
-                logger.info(f"Executing step {step.step}: {step.action}")
-
-                if step.action == "search_wikipedia":
-                    # Extract search query from description or use original prompt
-                    query = self._extract_search_query(
-                        step.description, original_prompt
-                    )
-                    result = await self.wikipedia_tool.search(query)
-                    step.result = result
-                    results.append(f"Wikipedia search: {result}")
-
-                elif step.action == "get_weather":
-                    # Extract location from description or prompt
-                    location = self._extract_location(step.description, original_prompt)
-                    result = await self.weather_tool.get_weather(location)
-                    step.result = result
-                    results.append(f"Weather info: {result}")
-
-                elif step.action == "synthesize":
-                    # Synthesize all collected information
-                    synthesis_prompt = f"""
-Based on the user's request: "{original_prompt}"
-
-Available information:
-{chr(10).join(results)}
-
-Provide a helpful, comprehensive response that addresses the user's request using the available information.
-"""
-
-                    response = self.openai_client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": synthesis_prompt}],
-                        temperature=0.3,
-                    )
+            step_queue.put_nowait(step)
+        step_queue.put_nowait(None)
+
+        return await self._execute_step_queue(step_queue, original_prompt)
+
+    async def _execute_step_queue(
+        self, step_queue: asyncio.Queue, original_prompt: str
+    ) -> str:
+        """Execute plan steps as they arrive on a queue, until a ``None`` sentinel."""
+        steps: List[TaskStep] = []
+        tool_tasks = []
+
+        # Tool lookups don't depend on each other, so start each one as soon
+        # as its step arrives and let their network I/O overlap
+        while (step := await step_queue.get()) is not None:
+            steps.append(step)
+            if step.action != "synthesize":
+                tool_tasks.append(
+                    asyncio.create_task(self._run_step(step, original_prompt, []))
+                )
 
-                    result = response.choices[0].message.content
-                    step.result = result
-                    results.append(result)
+        tool_results = await asyncio.gather(*tool_tasks, return_exceptions=True)
+        results = [result for result in tool_results if isinstance(result, str)]
 
-                step.status = "completed"
-
-            except Exception as e:
-                logger.error(f"Step {step.step} failed: {e}")
-                step.status = "failed"
-                step.result = f"Failed: {str(e)}"
+        # Synthesis consumes everything gathered so far, so it runs in order
+        for step in steps:
+            if step.action != "synthesize":
+                continue
+            result = await self._run_step(step, original_prompt, results)
+            if result:
+                results.append(result)
 
         # Return the final synthesis or last result
         final_results = [
-            step.result
-            for step in plan.steps
-            if step.result and step.action == "synthesize"
+            step.result for step in steps if step.result and step.action == "synthesize"
         ]
         if final_results:
             return final_results[-1]
@@ -270,21 +328,110 @@ Provide a helpful, comprehensive response that addresses the user's request usin
             # If no synthesis step, combine all results
             return "\n\n".join([r for r in results if r])
 
+    async def _run_step(
+        self, step: TaskStep, original_prompt: str, results: List[str]
+    ) -> Optional[str]:
+        """Run a single plan step and return its entry for the results list."""
+        try:
+            # Plain assignment; skips BaseModel.__setattr__ in the step loop
+            object.__setattr__(step, "status", StepStatus.RUNNING)
+            logger.info(f"Executing step {step.step}: {step.action}")
+            entry = None
+
+            if step.action == "search_wikipedia":
+                # Extract search query from description or use original prompt
+                query = self._extract_search_query(step.description, original_prompt)
+                result = await self.wikipedia_tool.search(query)
+                step.result = result
+                entry = f"Wikipedia search: {result}"
+
+            elif step.action == "get_weather":
+                # Extract location from description or prompt
+                location = self._extract_location(step.description, original_prompt)
+                result = await self.weather_tool.get_weather(location)
+                step.result = result
+                entry = f"Weather info: {result}"
+
+            elif step.action == "synthesize":
+                # Synthesize all collected information
+                synthesis_prompt = self._synthesis_prompt(
+                    original_prompt, _NL.join(results)
+                )
+
+                result = await self._chat_completion(synthesis_prompt, temperature=0.3)
+                step.result = result
+                entry = result
+
+            object.__setattr__(step, "status", StepStatus.COMPLETED)
+            return entry
+
+        except Exception as e:
+            logger.error(f"Step {step.step} failed: {e}")
+            object.__setattr__(step, "status", StepStatus.FAILED)
+            step.result = f"Failed: {str(e)}"
+            return None
+
+    @staticmethod
+    def _synthesis_prompt(original_prompt: str, information: str) -> str:
+        """Build the prompt for the final synthesize step."""
+        return _SYNTH_TMPL.format_map(
+            {"prompt": original_prompt, "results": information}
+        )
+
+    async def _stream_chat_completion(
+        self, prompt: str, temperature: float
+    ) -> AsyncIterator[str]:
+        """Stream a single-message chat completion as content deltas."""
+        stream = await self.openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            stream=True,
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    async def _stream_safe_output(
+        self, deltas: AsyncIterator[str]
+    ) -> AsyncIterator[str]:
+        """Safety-check streamed output one sentence at a time.
+
+        Raw deltas are buffered until a sentence boundary so that PII is
+        never forwarded before the gateway has had a chance to redact it.
+        """
+        buffer = ""
+        async for delta in deltas:
+            buffer += delta
+            boundary = None
+            for boundary in _SENTENCE_END.finditer(buffer):
+                pass
+            if boundary is None:
+                continue
+
+            segment, buffer = buffer[: boundary.end()], buffer[boundary.end() :]
+            output_safety = await self._safety_check_output(segment)
+            yield output_safety["safe_text"]
+
+        if buffer:
+            output_safety = await self._safety_check_output(buffer)
+            yield output_safety["safe_text"]
+
     def _extract_search_query(self, description: str, prompt: str) -> str:
         """Extract search query from step description or prompt."""
         # Simple extraction - in production, use more sophisticated NLP
-        if "about" in description.lower():
-            return description.split("about")[-1].strip()
+        if m := _ABOUT_RE.search(description):
+            return m.group(1).strip()
         return prompt[:100]  # Fallback to first 100 chars of prompt
 
     def _extract_location(self, description: str, prompt: str) -> str:
         """Extract location from step description or prompt."""
         # Simple extraction - in production, use NER
-        words = (description + " " + prompt).split()
-        # Look for common location indicators
-        for i, word in enumerate(words):
-            if word.lower() in ["in", "at", "for"] and i + 1 < len(words):
-                return words[i + 1]
+        if m := _LOC_RE.search(description) or _LOC_RE.search(prompt):
+            return m.group(1)
         return "London"  # Default fallback
 
     def _setup_routes(self):
@@ -308,7 +455,7 @@ Provide a helpful, comprehensive response that addresses the user's request usin
         @self.router.post("/agents/secure", response_model=AgentResponse)
         async def secure_agent(request: AgentRequest):
             """Secure agent interaction with Plan → Execute workflow and safety checks."""
-            trace_id = str(uuid.uuid4())
+            trace_id = secrets.token_hex(16)
 
             try:
                 logger.info(f"Processing agent request - trace_id: {trace_id}")
@@ -326,13 +473,15 @@ Provide a helpful, comprehensive response that addresses the user's request usin
                 # Use the safe version of the prompt
                 safe_prompt = input_safety["safe_text"]
 
-                # Step 1: Generate plan (planning phase)
-                plan = await self._generate_plan(safe_prompt)
+                # Step 1 + 2: Generate plan and execute steps as they stream in
+                step_queue: asyncio.Queue = asyncio.Queue()
+                planning = asyncio.create_task(
+                    self._generate_plan(safe_prompt, step_queue)
+                )
+                raw_response = await self._execute_step_queue(step_queue, safe_prompt)
+                plan = await planning
                 logger.info(f"Generated plan with {len(plan.steps)} steps")
 
-                # Step 2: Execute plan (execution phase)
-                raw_response = await self._execute_plan(plan, safe_prompt)
-
                 # Step 3: Safety check output
                 output_safety = await self._safety_check_output(raw_response)
                 safe_response = output_safety["safe_text"]
@@ -357,30 +506,92 @@ Provide a helpful, comprehensive response that addresses the user's request usin
                     status_code=500, detail=f"Agent processing failed: {str(e)}"
                 )
 
+        @self.router.post("/agents/secure/stream")
+        async def secure_agent_stream(request: AgentRequest):
+            """Secure agent interaction with the synthesize step streamed as SSE.
+
+            Plan generation and tool calls run as in ``/agents/secure``; only the
+            final synthesis is streamed, sentence by sentence, after each
+            sentence has passed the output safety check.
+            """
+            trace_id = secrets.token_hex(16)
+
+            async def event_stream() -> AsyncIterator[str]:
+                try:
+                    logger.info(
+                        f"Processing streaming agent request - trace_id: {trace_id}"
+                    )
+                    yield _sse_event({"type": "start", "trace_id": trace_id})
+
+                    input_safety = await self._safety_check_input(request.prompt)
+                    if not input_safety["safe"]:
+                        yield _sse_event(
+                            {
+                                "type": "delta",
+                                "content": "I cannot process this request as it contains sensitive information that violates our privacy policy.",
+                            }
+                        )
+                        yield _sse_event(
+                            {"type": "done", "trace_id": trace_id, "blocked": True}
+                        )
+                        return
+
+                    safe_prompt = input_safety["safe_text"]
+                    plan = await self._generate_plan(safe_prompt)
+
+                    # Run the tool steps up front; only synthesis is streamed
+                    tool_plan = plan.model_copy(
+                        update={
+                            "steps": [
+                                step
+                                for step in plan.steps
+                                if step.action != "synthesize"
+                            ]
+                        }
+                    )
+                    information = await self._execute_plan(tool_plan, safe_prompt)
+                    synthesis_prompt = self._synthesis_prompt(safe_prompt, information)
+
+                    deltas = self._stream_chat_completion(
+                        synthesis_prompt, temperature=0.3
+                    )
+                    async for safe_text in self._stream_safe_output(deltas):
+                        yield _sse_event({"type": "delta", "content": safe_text})
+
+                    yield _sse_event(
+                        {
+                            "type": "done",
+                            "trace_id": trace_id,
+                            "blocked": False,
+                            "plan": plan.model_dump(),
+                        }
+                    )
+                    logger.info(
+                        f"Streaming agent request completed - trace_id: {trace_id}"
+                    )
+
+                except Exception as e:
+                    logger.error(
+                        f"Streaming agent request failed - trace_id: {trace_id}, error: {e}"
+                    )
+                    yield _sse_event(
+                        {
+                            "type": "error",
+                            "trace_id": trace_id,
+                            "detail": f"Agent processing failed: {str(e)}",
+                        }
+                    )
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
         @self.router.get("/reports")
-        async def get_reports():
-            """Get compliance reports."""
-            # TODO: Implement actual reporting from database
-            return {
-                "reports": [
-                    {
-                        "id": "report-1",
-                        "date": "2024-01-15",
-                        "total_requests": 150,
-                        "blocked_requests": 5,
-                        "redacted_requests": 23,
-                        "pii_types_detected": [
-                            "EMAIL_ADDRESS",
-                            "PHONE_NUMBER",
-                            "PERSON",
-                        ],
-                    }
-                ],
-                "total": 1,
-                "summary": {
-                    "total_requests": 150,
-                    "block_rate": 0.033,
-                    "redaction_rate": 0.153,
-                    "most_common_pii": "EMAIL_ADDRESS",
-                },
-            }
+        async def get_reports(request: Request):
+            """Get the agent's LLM cache statistics."""
+            # Compliance reports come from the gateway's admin API
+            body = orjson.dumps({"llm_cache": self.llm_cache.stats()})
+            etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+            if request.headers.get("if-none-match") == etag:
+                return Response(status_code=304, headers={"ETag": etag})
+            return Response(
+                content=body, media_type="application/json", headers={"ETag": etag}
+            )
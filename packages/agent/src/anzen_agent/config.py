@@ -5,6 +5,7 @@ Settings and configuration management.
 """
 
 import os
+from functools import lru_cache
 from typing import List
 
 from pydantic_settings import BaseSettings
@@ -39,6 +40,7 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings."""
+    """Get application settings (parsed once; ``cache_clear`` to re-read env)."""
     return Settings()
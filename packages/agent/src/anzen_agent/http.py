@@ -0,0 +1,62 @@
+"""
+Shared HTTP Client for Anzen Agent
+
+A single pooled HTTP/2 client reused by the safety client and external
+tools, so keep-alive connections and TLS sessions are shared across calls.
+"""
+
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=200,
+                max_keepalive_connections=100,
+                keepalive_expiry=60.0,
+            ),
+            timeout=30.0,
+        )
+    return _client
+
+
+async def close_client():
+    """Close the process-wide HTTP client."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def warm_up(urls: Iterable[str], client: Optional[httpx.AsyncClient] = None):
+    """
+    Open pooled connections to the given endpoints ahead of the first request.
+
+    DNS resolution and the TLS handshake then happen once at startup instead
+    of on a user request; the connections stay in the pool for reuse.
+
+    Args:
+        urls: Endpoints to connect to; the response status is irrelevant
+        client: Client whose pool to warm (defaults to the shared client)
+    """
+    client = client or get_client()
+
+    async def connect(url: str):
+        try:
+            await client.head(url, timeout=5.0)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not pre-connect to {url}: {e}")
+
+    await asyncio.gather(*(connect(url) for url in urls))
@@ -0,0 +1,184 @@
+"""
+LLM Response Cache for Anzen Agent
+
+Short-circuits repeated (or near-identical) chat completions so that
+recurring prompts skip the OpenAI round-trip entirely.
+"""
+
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+import orjson
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """Exact + semantic cache for low-temperature chat completions."""
+
+    def __init__(
+        self,
+        openai_client: Any = None,
+        maxsize: int = 1024,
+        ttl: float = 3600,
+        max_temperature: float = 0.3,
+        similarity_threshold: float = 0.92,
+        embedding_model: str = "text-embedding-3-small",
+    ):
+        self.openai_client = openai_client
+        self.max_temperature = max_temperature
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+
+        self._responses: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._maxsize = maxsize
+
+        # Ring buffer of unit-length embeddings for near-match lookups; the
+        # matrix is allocated on the first store once the dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = [None] * maxsize
+        self._slot_scopes = np.full(maxsize, -1, dtype=np.int32)
+        self._scope_ids: Dict[str, int] = {}
+        self._next_slot = 0
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        """Build the exact-match cache key for a completion request."""
+        payload = orjson.dumps(
+            {"model": model, "messages": messages, "temperature": temperature},
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(payload).hexdigest()
+
+    def cacheable(self, temperature: float) -> bool:
+        """Only near-deterministic completions are safe to reuse."""
+        return temperature <= self.max_temperature
+
+    async def get_or_compute(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[str]],
+        text: Optional[str] = None,
+        scope: str = "",
+    ) -> str:
+        """
+        Return the cached completion for ``key`` or compute and store it.
+
+        Args:
+            key: Exact-match key from ``make_key``
+            fn: Coroutine factory producing the completion text on a miss
+            text: Prompt text used for semantic near-matching (optional)
+            scope: Partition for near-matching, e.g. "model:temperature"
+
+        Returns:
+            Completion text
+        """
+        cached = self._responses.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        if not text or self.openai_client is None:
+            self.misses += 1
+            result = await fn()
+            self._responses[key] = result
+            return result
+
+        if not self._has_scope(scope):
+            # Nothing to near-match against yet, so embed alongside the
+            # completion instead of paying for a serial round trip
+            self.misses += 1
+            result, embedding = await asyncio.gather(fn(), self._embed(text))
+            self._store(key, result, scope, embedding)
+            return result
+
+        embedding = await self._embed(text)
+        if embedding is not None:
+            match = self._nearest(scope, embedding)
+            if match is not None:
+                self.semantic_hits += 1
+                return match
+
+        self.misses += 1
+        result = await fn()
+        self._store(key, result, scope, embedding)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters."""
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                (self.hits + self.semantic_hits) / lookups if lookups > 0 else 0
+            ),
+            "size": len(self._responses),
+        }
+
+    def _store(
+        self, key: str, result: str, scope: str, embedding: Optional[np.ndarray]
+    ):
+        self._responses[key] = result
+        if embedding is None:
+            return
+        if self._vectors is None:
+            self._vectors = np.zeros((self._maxsize, embedding.shape[0]), np.float32)
+        elif embedding.shape[0] != self._vectors.shape[1]:
+            return
+
+        slot = self._next_slot
+        self._next_slot = (slot + 1) % self._maxsize
+        self._vectors[slot] = embedding
+        self._slot_keys[slot] = key
+        self._slot_scopes[slot] = self._scope_ids.setdefault(
+            scope, len(self._scope_ids)
+        )
+
+    def _has_scope(self, scope: str) -> bool:
+        scope_id = self._scope_ids.get(scope)
+        return scope_id is not None and bool((self._slot_scopes == scope_id).any())
+
+    def _nearest(self, scope: str, embedding: np.ndarray) -> Optional[str]:
+        """Find a cached response whose prompt is semantically close enough."""
+        if self._vectors is None or embedding.shape[0] != self._vectors.shape[1]:
+            return None
+
+        scores = self._vectors @ embedding
+        scores[self._slot_scopes != self._scope_ids[scope]] = -1.0
+        for slot in np.argsort(scores)[::-1]:
+            if scores[slot] < self.similarity_threshold:
+                return None
+            cached = self._responses.get(self._slot_keys[slot])
+            if cached is not None:
+                return cached
+            # Expired from the TTL cache; free the stale slot
+            self._slot_keys[slot] = None
+            self._slot_scopes[slot] = -1
+        return None
+
+    async def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Embed text and normalise it so cosine similarity is a dot product."""
+        try:
+            response = await self.openai_client.embeddings.create(
+                model=self.embedding_model, input=text
+            )
+            vector = response.data[0].embedding
+        except Exception as e:
+            logger.debug(f"Embedding lookup failed, skipping semantic cache: {e}")
+            return None
+
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None
+        return vector / norm
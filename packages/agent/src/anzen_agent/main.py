@@ -7,15 +7,27 @@ Implements a 2-step workflow: (1) plan → (2) execute with Wikipedia/Weather AP
 
 import argparse
 import logging
+import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .agent import AnzenAgent
 from .config import get_settings
+from .http import close_client, get_client, warm_up
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Pre-connect to upstream services and release the HTTP client on shutdown."""
+    await warm_up(app.state.agent.endpoints, app.state.http)
+    yield
+    await close_client()
 
 
 def create_app() -> FastAPI:
@@ -28,8 +40,13 @@ def create_app() -> FastAPI:
         version="0.1.0",
         docs_url="/docs" if settings.debug else None,
         redoc_url="/redoc" if settings.debug else None,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
+    # Shared pooled HTTP client for the gateway and external tools
+    app.state.http = get_client()
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -44,8 +61,11 @@ def create_app() -> FastAPI:
         gateway_url=settings.gateway_url,
         openai_api_key=settings.openai_api_key,
         gateway_api_key=settings.gateway_api_key,
+        http_client=app.state.http,
     )
 
+    app.state.agent = agent
+
     # Include the agent routes
     app.include_router(agent.router, prefix="/v1")
 
@@ -64,6 +84,12 @@ def main():
     parser.add_argument("--port", type=int, default=8001, help="Port to bind to")
     parser.add_argument("--gateway-url", help="URL of the Anzen Safety Gateway")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (ignored with --reload)",
+    )
     parser.add_argument("--log-level", default="info", help="Log level")
 
     args = parser.parse_args()
@@ -74,21 +100,25 @@ def main():
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
 
-    # Set gateway URL if provided
+    # Set gateway URL if provided (inherited by worker processes)
     if args.gateway_url:
-        import os
-
         os.environ["ANZEN_GATEWAY_URL"] = args.gateway_url
+        get_settings.cache_clear()
 
-    # Create the app
-    app = create_app()
+    # uvloop (libuv event loop) is not available on Windows
+    loop = "uvloop" if sys.platform != "win32" else "auto"
 
-    # Run the server
+    # Run the server; reload and multiple workers need an import string, so
+    # each process builds its own app through the factory
     uvicorn.run(
-        app,
+        "anzen_agent.main:create_app",
+        factory=True,
         host=args.host,
         port=args.port,
         reload=args.reload,
+        workers=None if args.reload else args.workers,
+        loop=loop,
+        http="httptools",
         log_level=args.log_level,
     )
 
@@ -4,9 +4,10 @@ Anzen AI Agent Models
 Pydantic models for agent requests and responses.
 """
 
+from enum import IntEnum
 from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_serializer, field_validator
 
 
 class AgentRequest(BaseModel):
@@ -18,15 +19,36 @@ class AgentRequest(BaseModel):
     context: Dict[str, Any] = {}
 
 
+class StepStatus(IntEnum):
+    """Execution state of a task step."""
+
+    PENDING = 0
+    RUNNING = 1
+    COMPLETED = 2
+    FAILED = 3
+
+
 class TaskStep(BaseModel):
     """Individual task step in the plan."""
 
     step: int
     action: str
     description: str
-    status: str = "pending"  # pending, running, completed, failed
+    status: StepStatus = StepStatus.PENDING
     result: Optional[str] = None
 
+    @field_validator("status", mode="before")
+    @classmethod
+    def _parse_status(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return StepStatus[value.upper()]
+        return value
+
+    @field_serializer("status")
+    def _serialize_status(self, status: StepStatus) -> str:
+        # Keep the lowercase string form on the wire
+        return status.name.lower()
+
 
 class TaskPlan(BaseModel):
     """Task plan generated by the agent."""
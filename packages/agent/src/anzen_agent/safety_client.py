@@ -4,10 +4,16 @@ Safety Client for Anzen Gateway Integration
 HTTP client for communicating with the Anzen Safety Gateway.
 """
 
+import asyncio
+import hashlib
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import httpx
+import orjson
+from cachetools import TTLCache
+
+from .http import get_client
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +21,42 @@ logger = logging.getLogger(__name__)
 class SafetyClient:
     """Client for communicating with the Anzen Safety Gateway."""
 
-    def __init__(self, gateway_url: str, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        gateway_url: str,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        batch_size: int = 32,
+        batch_window: float = 0.005,
+    ):
         self.gateway_url = gateway_url.rstrip("/")
         self.api_key = api_key
 
-        # Set up headers with API key if provided
-        headers = {}
+        # Headers are sent per request so the pooled client stays shareable
+        self.headers = {"Content-Type": "application/json"}
         if api_key:
-            headers["Authorization"] = f"Bearer {api_key}"
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+        self.client = client or get_client()
+
+        # (direction, text digest, route, language) -> ALLOW/REDACT result
+        self._cache: TTLCache = TTLCache(maxsize=50_000, ttl=300)
 
-        self.client = httpx.AsyncClient(timeout=30.0, headers=headers)
+        # Concurrent input checks are coalesced into batched POSTs; the queue
+        # and its drain task are created lazily on the running event loop
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._batch_supported = True
+        self._flushes: Set[asyncio.Task] = set()
 
     async def check_input(
-        self, text: str, route: str = "private:agent", language: str = "en"
+        self,
+        text: str,
+        route: str = "private:agent",
+        language: str = "en",
+        no_cache: bool = False,
     ) -> Dict[str, Any]:
         """
         Check input text for PII and safety issues.
@@ -36,31 +65,19 @@ class SafetyClient:
             text: Input text to check
             route: Route classification (e.g., "private:agent")
             language: Language code
+            no_cache: Always ask the gateway (e.g. for audited requests)
 
         Returns:
             Safety check result with decision, entities, safe_text, etc.
         """
-        try:
-            url = f"{self.gateway_url}/v1/anzen/check/input"
-            payload = {"text": text, "route": route, "language": language}
-
-            logger.debug(f"Sending input safety check to {url}")
-            response = await self.client.post(url, json=payload)
-            response.raise_for_status()
-
-            result = response.json()
-            logger.debug(f"Input safety check result: {result['decision']}")
-            return result
-
-        except httpx.HTTPError as e:
-            logger.error(f"HTTP error during input safety check: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Unexpected error during input safety check: {e}")
-            raise
+        return await self._check("input", text, route, language, no_cache)
 
     async def check_output(
-        self, text: str, route: str = "private:agent", language: str = "en"
+        self,
+        text: str,
+        route: str = "private:agent",
+        language: str = "en",
+        no_cache: bool = False,
     ) -> Dict[str, Any]:
         """
         Check output text for PII and apply redaction.
@@ -69,29 +86,151 @@ class SafetyClient:
             text: Output text to check
             route: Route classification (e.g., "private:agent")
             language: Language code
+            no_cache: Always ask the gateway (e.g. for audited requests)
 
         Returns:
             Safety check result with decision, entities, safe_text, etc.
         """
-        try:
-            url = f"{self.gateway_url}/v1/anzen/check/output"
-            payload = {"text": text, "route": route, "language": language}
-
-            logger.debug(f"Sending output safety check to {url}")
-            response = await self.client.post(url, json=payload)
-            response.raise_for_status()
-
-            result = response.json()
-            logger.debug(f"Output safety check result: {result['decision']}")
-            return result
+        return await self._check("output", text, route, language, no_cache)
 
+    async def _check(
+        self, direction: str, text: str, route: str, language: str, no_cache: bool
+    ) -> Dict[str, Any]:
+        """Shared body of ``check_input``/``check_output``."""
+        key = self._cache_key(direction, text, route, language)
+        if not no_cache:
+            cached = self._cache.get(key)
+            if cached is not None:
+                logger.debug(f"{direction} safety check cache hit")
+                return dict(cached)
+
+        payload = {"text": text, "route": route, "language": language}
+        try:
+            if direction == "input" and self.batch_size > 1 and self._batch_supported:
+                result = await self._enqueue(payload)
+            else:
+                result = await self._post(direction, payload)
         except httpx.HTTPError as e:
-            logger.error(f"HTTP error during output safety check: {e}")
+            logger.error(f"HTTP error during {direction} safety check: {e}")
             raise
         except Exception as e:
-            logger.error(f"Unexpected error during output safety check: {e}")
+            logger.error(f"Unexpected error during {direction} safety check: {e}")
             raise
 
+        logger.debug(f"{direction} safety check result: {result['decision']}")
+        self._remember(key, result)
+        return result
+
+    async def _post(self, direction: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single check to the gateway's ``/check/{direction}`` endpoint."""
+        url = f"{self.gateway_url}/v1/anzen/check/{direction}"
+        logger.debug(f"Sending {direction} safety check to {url}")
+        response = await self.client.post(
+            url, content=orjson.dumps(payload), headers=self.headers
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    async def _enqueue(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue an input check for the batcher and wait for its result."""
+        if self._batcher is None or self._batcher.done():
+            self._batch_queue = asyncio.Queue()
+            self._batcher = asyncio.create_task(self._run_batcher())
+
+        future = asyncio.get_running_loop().create_future()
+        self._batch_queue.put_nowait((payload, future))
+        return await future
+
+    async def _run_batcher(self):
+        """Drain the queue every ``batch_window`` seconds or ``batch_size`` items."""
+        loop = asyncio.get_running_loop()
+        queue = self._batch_queue
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Flush in the background so the next window starts immediately
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """
+        Send a batch of input checks and resolve their futures.
+
+        The gateway's ``/check/input/batch`` endpoint takes ``{"items": [...]}``
+        and returns ``{"results": [...]}`` in the same order. If it answers 404
+        batching is switched off and checks go out as individual requests,
+        which still share one multiplexed HTTP/2 connection.
+        """
+        if len(batch) > 1 and self._batch_supported:
+            url = f"{self.gateway_url}/v1/anzen/check/input/batch"
+            body = {"items": [payload for payload, _ in batch]}
+            try:
+                logger.debug(f"Sending {len(batch)} input safety checks to {url}")
+                response = await self.client.post(
+                    url, content=orjson.dumps(body), headers=self.headers
+                )
+                if response.status_code == 404:
+                    logger.info("Gateway has no batch endpoint, sending checks singly")
+                    self._batch_supported = False
+                else:
+                    response.raise_for_status()
+                    results = orjson.loads(response.content)["results"]
+                    if len(results) != len(batch):
+                        # Results are matched by position, so none can be trusted
+                        raise ValueError(
+                            f"Batch check returned {len(results)} results "
+                            f"for {len(batch)} items"
+                        )
+                    for (_, future), result in zip(batch, results):
+                        if not future.done():
+                            future.set_result(result)
+                    return
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+        await asyncio.gather(
+            *(
+                self._resolve(future, self._post("input", payload))
+                for payload, future in batch
+            )
+        )
+
+    @staticmethod
+    async def _resolve(future: asyncio.Future, coro):
+        try:
+            result = await coro
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _cache_key(
+        direction: str, text: str, route: str, language: str
+    ) -> Tuple[str, bytes, str, str]:
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        return (direction, digest, route, language)
+
+    def _remember(self, key: Tuple[str, bytes, str, str], result: Dict[str, Any]):
+        # BLOCK decisions are never reused: the policy behind them may change
+        if result.get("decision") in ("ALLOW", "REDACT"):
+            self._cache[key] = dict(result)
+
     async def health_check(self) -> bool:
         """
         Check if the safety gateway is healthy.
@@ -101,12 +240,8 @@ class SafetyClient:
         """
         try:
             url = f"{self.gateway_url}/health"
-            response = await self.client.get(url)
+            response = await self.client.get(url, headers=self.headers)
             return response.status_code == 200
         except Exception as e:
             logger.error(f"Gateway health check failed: {e}")
             return False
-
-    async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
@@ -0,0 +1,107 @@
+"""
+Incremental JSON parsing for streamed LLM output
+
+Extracts the elements of a top-level array (e.g. a plan's ``steps``) as
+soon as each one is complete, so work can start before the full document
+has been generated.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+
+class StreamJSON:
+    """Stack-based streaming parser for a JSON object with an array member."""
+
+    def __init__(self, array_key: str = "steps"):
+        self.array_key = array_key
+        self._text = ""
+        self._pos = 0
+
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+
+        self._array_depth: Optional[int] = None
+        self._element_start: Optional[int] = None
+
+    @property
+    def consumed(self) -> bool:
+        """Whether any input has been pushed yet."""
+        return bool(self._text)
+
+    def push(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Feed a chunk of the document.
+
+        Args:
+            chunk: Next piece of streamed JSON text
+
+        Returns:
+            Array elements that were completed by this chunk
+        """
+        self._text += chunk
+        completed = []
+
+        text = self._text
+        for i in range(self._pos, len(text)):
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1 : i]
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":":
+                if self._stack and self._stack[-1] == "{":
+                    self._pending_key = self._last_string
+            elif c == ",":
+                self._pending_key = None
+            elif c in "{[":
+                if (
+                    c == "["
+                    and len(self._stack) == 1
+                    and self._pending_key == self.array_key
+                ):
+                    self._array_depth = 2
+                if (
+                    c == "{"
+                    and self._array_depth is not None
+                    and len(self._stack) == self._array_depth
+                ):
+                    self._element_start = i
+                self._stack.append(c)
+                self._pending_key = None
+            elif c in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if self._array_depth is None:
+                    continue
+                if (
+                    c == "}"
+                    and self._element_start is not None
+                    and len(self._stack) == self._array_depth
+                ):
+                    completed.append(orjson.loads(text[self._element_start : i + 1]))
+                    self._element_start = None
+                elif c == "]" and len(self._stack) == self._array_depth - 1:
+                    self._array_depth = None
+
+        self._pos = len(text)
+        return completed
+
+    def get(self) -> Dict[str, Any]:
+        """Parse and return the complete document."""
+        return orjson.loads(self._text)
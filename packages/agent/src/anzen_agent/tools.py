@@ -4,51 +4,87 @@ External API Tools for Anzen Agent
 Tools for accessing Wikipedia and Weather APIs.
 """
 
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
 
 import httpx
+import orjson
+from cachetools import TTLCache
 
-# Try to import wikipedia, handle if not available
-try:
-    import wikipedia
-
-    WIKIPEDIA_AVAILABLE = True
-except Exception as e:
-    WIKIPEDIA_AVAILABLE = False
-
-    # Mock wikipedia module
-    class MockWikipedia:
-        @staticmethod
-        def set_lang(lang):
-            pass
-
-        @staticmethod
-        def search(query, results=3):
-            return ["Mock result"]
-
-        @staticmethod
-        def summary(title, sentences=3):
-            return "Mock Wikipedia summary"
-
-        class DisambiguationError(Exception):
-            def __init__(self):
-                self.options = ["Mock option"]
-
-        class PageError(Exception):
-            pass
-
-    wikipedia = MockWikipedia()
+from .http import get_client
 
 logger = logging.getLogger(__name__)
 
+# WMO weather interpretation codes
+_WMO_CODES: Dict[int, str] = {
+    0: "Clear sky",
+    1: "Mainly clear",
+    2: "Partly cloudy",
+    3: "Overcast",
+    45: "Fog",
+    48: "Depositing rime fog",
+    51: "Light drizzle",
+    53: "Moderate drizzle",
+    55: "Dense drizzle",
+    61: "Slight rain",
+    63: "Moderate rain",
+    65: "Heavy rain",
+    71: "Slight snow",
+    73: "Moderate snow",
+    75: "Heavy snow",
+    77: "Snow grains",
+    80: "Slight rain showers",
+    81: "Moderate rain showers",
+    82: "Violent rain showers",
+    85: "Slight snow showers",
+    86: "Heavy snow showers",
+    95: "Thunderstorm",
+    96: "Thunderstorm with slight hail",
+    99: "Thunderstorm with heavy hail",
+}
+
+# Codes are small integers, so index a flat tuple instead of hashing per call
+_WMO_TABLE: Tuple[str, ...] = tuple(_WMO_CODES.get(i, "") for i in range(100))
+
 
 class WikipediaTool:
     """Tool for searching Wikipedia."""
 
-    def __init__(self):
-        # Set Wikipedia to English and limit results
-        wikipedia.set_lang("en")
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or get_client()
+        self.timeout = 10.0
+        # English Wikipedia via the MediaWiki Action API
+        self.api_url = "https://en.wikipedia.org/w/api.php"
+        self.headers = {"User-Agent": "anzen-agent/0.1.0 (https://anzen.dev)"}
+
+    async def _query(self, **params: Any) -> Dict[str, Any]:
+        """Run a MediaWiki ``action=query`` request."""
+        response = await self.client.get(
+            self.api_url,
+            params={"action": "query", "format": "json", "formatversion": 2, **params},
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return orjson.loads(response.content)
+
+    async def _page(self, title: str) -> Optional[Dict[str, Any]]:
+        """Fetch the intro extract, page props and first link for a title."""
+        data = await self._query(
+            titles=title,
+            prop="extracts|pageprops|links",
+            exintro=1,
+            explaintext=1,
+            exsentences=3,
+            plnamespace=0,
+            pllimit=1,
+            redirects=1,
+        )
+        pages = data.get("query", {}).get("pages", [])
+        if not pages or pages[0].get("missing"):
+            return None
+        return pages[0]
 
     async def search(self, query: str, max_length: int = 500) -> str:
         """
@@ -65,34 +101,34 @@ class WikipediaTool:
             logger.info(f"Searching Wikipedia for: {query}")
 
             # Search for pages
-            search_results = wikipedia.search(query, results=3)
+            data = await self._query(list="search", srsearch=query, srlimit=3)
+            search_results = [
+                hit["title"] for hit in data.get("query", {}).get("search", [])
+            ]
 
             if not search_results:
                 return f"No Wikipedia results found for '{query}'"
 
             # Try to get summary of the first result
-            try:
-                summary = wikipedia.summary(search_results[0], sentences=3)
-
-                # Truncate if too long
-                if len(summary) > max_length:
-                    summary = summary[:max_length] + "..."
-
-                logger.info(f"Wikipedia search successful: {len(summary)} characters")
-                return summary
+            page = await self._page(search_results[0])
+            if page is None:
+                return f"No Wikipedia page found for '{query}'"
 
-            except wikipedia.DisambiguationError as e:
+            if "disambiguation" in page.get("pageprops", {}):
                 # Try the first option from disambiguation
-                try:
-                    summary = wikipedia.summary(e.options[0], sentences=3)
-                    if len(summary) > max_length:
-                        summary = summary[:max_length] + "..."
-                    return summary
-                except:
+                links = page.get("links", [])
+                page = await self._page(links[0]["title"]) if links else None
+                if page is None or "disambiguation" in page.get("pageprops", {}):
                     return f"Found multiple results for '{query}'. Please be more specific."
 
-            except wikipedia.PageError:
-                return f"No Wikipedia page found for '{query}'"
+            summary = page.get("extract", "")
+
+            # Truncate if too long
+            if len(summary) > max_length:
+                summary = summary[:max_length] + "..."
+
+            logger.info(f"Wikipedia search successful: {len(summary)} characters")
+            return summary
 
         except Exception as e:
             logger.error(f"Wikipedia search failed: {e}")
@@ -102,26 +138,46 @@ class WikipediaTool:
 class WeatherTool:
     """Tool for getting weather information."""
 
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=10.0)
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client or get_client()
+        self.timeout = 10.0
         # Using a free weather API (OpenWeatherMap alternative)
         self.base_url = "https://api.open-meteo.com/v1/forecast"
-
-    async def get_weather(self, location: str) -> str:
-        """
-        Get current weather for a location.
-
-        Args:
-            location: Location name (city, country)
-
-        Returns:
-            Weather description or error message
-        """
+        self.geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
+
+        # Coordinates are near-static; current conditions change slowly
+        self._geo_cache: TTLCache = TTLCache(maxsize=10_000, ttl=86400)
+        self._forecast_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+
+    async def _cached(
+        self,
+        cache: TTLCache,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return ``cache[key]``, fetching it once even under concurrent misses."""
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
         try:
-            logger.info(f"Getting weather for: {location}")
-
-            # First, get coordinates for the location using geocoding
-            geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
+            async with lock:
+                value = cache.get(key)
+                if value is None:
+                    value = await fetch()
+                    if value is not None:
+                        cache[key] = value
+                return value
+        finally:
+            if not lock.locked():
+                self._locks.pop(key, None)
+
+    async def _geocode(self, location: str) -> Optional[Tuple[float, float, str, str]]:
+        """Resolve a location name to (lat, lon, name, country)."""
+
+        async def fetch():
             geocoding_params = {
                 "name": location,
                 "count": 1,
@@ -130,22 +186,28 @@ class WeatherTool:
             }
 
             geocoding_response = await self.client.get(
-                geocoding_url, params=geocoding_params
+                self.geocoding_url, params=geocoding_params, timeout=self.timeout
             )
             geocoding_response.raise_for_status()
-            geocoding_data = geocoding_response.json()
+            geocoding_data = orjson.loads(geocoding_response.content)
 
             if not geocoding_data.get("results"):
-                return f"Location '{location}' not found"
+                return None
 
-            # Get coordinates
             location_data = geocoding_data["results"][0]
-            lat = location_data["latitude"]
-            lon = location_data["longitude"]
-            location_name = location_data["name"]
-            country = location_data.get("country", "")
+            return (
+                location_data["latitude"],
+                location_data["longitude"],
+                location_data["name"],
+                location_data.get("country", ""),
+            )
 
-            # Get weather data
+        return await self._cached(self._geo_cache, location.lower().strip(), fetch)
+
+    async def _current_conditions(self, lat: float, lon: float) -> Dict[str, Any]:
+        """Get current conditions, coalescing bursts for nearby coordinates."""
+
+        async def fetch():
             weather_params = {
                 "latitude": lat,
                 "longitude": lon,
@@ -154,13 +216,38 @@ class WeatherTool:
             }
 
             weather_response = await self.client.get(
-                self.base_url, params=weather_params
+                self.base_url, params=weather_params, timeout=self.timeout
             )
             weather_response.raise_for_status()
-            weather_data = weather_response.json()
+            return orjson.loads(weather_response.content)["current"]
+
+        key = (round(lat, 2), round(lon, 2))
+        return await self._cached(self._forecast_cache, key, fetch)
+
+    async def get_weather(self, location: str) -> str:
+        """
+        Get current weather for a location.
+
+        Args:
+            location: Location name (city, country)
+
+        Returns:
+            Weather description or error message
+        """
+        try:
+            logger.info(f"Getting weather for: {location}")
+
+            # First, get coordinates for the location using geocoding
+            coordinates = await self._geocode(location)
+            if coordinates is None:
+                return f"Location '{location}' not found"
+
+            lat, lon, location_name, country = coordinates
+
+            # Get weather data
+            current = await self._current_conditions(lat, lon)
 
             # Extract current weather
-            current = weather_data["current"]
             temperature = current["temperature_2m"]
             humidity = current["relative_humidity_2m"]
             wind_speed = current["wind_speed_10m"]
@@ -186,34 +273,6 @@ class WeatherTool:
 
     def _weather_code_to_description(self, code: int) -> str:
         """Convert WMO weather code to description."""
-        weather_codes = {
-            0: "Clear sky",
-            1: "Mainly clear",
-            2: "Partly cloudy",
-            3: "Overcast",
-            45: "Fog",
-            48: "Depositing rime fog",
-            51: "Light drizzle",
-            53: "Moderate drizzle",
-            55: "Dense drizzle",
-            61: "Slight rain",
-            63: "Moderate rain",
-            65: "Heavy rain",
-            71: "Slight snow",
-            73: "Moderate snow",
-            75: "Heavy snow",
-            77: "Snow grains",
-            80: "Slight rain showers",
-            81: "Moderate rain showers",
-            82: "Violent rain showers",
-            85: "Slight snow showers",
-            86: "Heavy snow showers",
-            95: "Thunderstorm",
-            96: "Thunderstorm with slight hail",
-            99: "Thunderstorm with heavy hail",
-        }
-        return weather_codes.get(code, f"Unknown weather (code: {code})")
-
-    async def close(self):
-        """Close the HTTP client."""
-        await self.client.aclose()
+        if 0 <= code < len(_WMO_TABLE) and _WMO_TABLE[code]:
+            return _WMO_TABLE[code]
+        return f"Unknown weather (code: {code})"
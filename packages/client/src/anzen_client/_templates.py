@@ -0,0 +1,50 @@
+"""
+Shared Jinja2 Environment for Anzen Client
+
+One template environment per debug mode so compiled templates are shared by
+every AnzenClient instance and persisted to a bytecode cache across restarts.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+TEMPLATE_DIR = Path(__file__).parent.parent.parent / "templates"
+
+# Only served in debug mode (see AnzenClient), so never precompiled
+DEBUG_ONLY_TEMPLATES = frozenset({"dashboard.html"})
+
+# Jinja's default directory is private to the current user and is checked
+# for ownership and permissions, so other users cannot plant bytecode in it
+_bytecode_cache = FileSystemBytecodeCache()
+
+
+@lru_cache(maxsize=2)
+def get_environment(debug: bool) -> Environment:
+    """
+    Get the shared template environment for a debug mode.
+
+    Args:
+        debug: Reload templates when they change on disk instead of
+            precompiling them once
+
+    Returns:
+        Jinja2 environment
+    """
+    env = Environment(
+        loader=FileSystemLoader(str(TEMPLATE_DIR)),
+        autoescape=True,
+        auto_reload=debug,
+        cache_size=400,
+        bytecode_cache=_bytecode_cache,
+    )
+
+    if not debug:
+        # Compile every page up front: fills the in-memory cache and, on a
+        # cold bytecode cache, writes the compiled code for the next start
+        for name in env.list_templates(extensions=["html"]):
+            if name not in DEBUG_ONLY_TEMPLATES:
+                env.get_template(name)
+
+    return env
@@ -4,24 +4,35 @@ Anzen Client Application
 FastAPI application serving the React/Next.js frontend.
 """
 
-from pathlib import Path
+import hashlib
 
+import orjson
 from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.templating import Jinja2Templates
 
+from ._templates import get_environment
+
 
 class AnzenClient:
     """Anzen Client main class."""
 
-    def __init__(self, agent_url: str, gateway_url: str):
+    def __init__(self, agent_url: str, gateway_url: str, debug: bool = False):
         self.agent_url = agent_url
         self.gateway_url = gateway_url
+        self.debug = debug
         self.router = APIRouter()
 
-        # Setup templates
-        template_dir = Path(__file__).parent.parent.parent / "templates"
-        self.templates = Jinja2Templates(directory=str(template_dir))
+        # The config never changes for the life of the process
+        self._config_json = orjson.dumps(
+            {"agent_url": agent_url, "gateway_url": gateway_url, "version": "0.1.0"}
+        )
+        self._config_etag = (
+            f'"{hashlib.blake2b(self._config_json, digest_size=8).hexdigest()}"'
+        )
+
+        # Setup templates (shared, precompiled environment)
+        self.templates = Jinja2Templates(env=get_environment(debug))
 
         self._setup_routes()
 
@@ -32,21 +43,26 @@ class AnzenClient:
         async def chat_interface(request: Request):
             """Main chat interface."""
             return self.templates.TemplateResponse(
-                "index.html", {"request": request, "title": "Anzen - Safe AI Chat"}
+                request, "index.html", {"title": "Anzen - Safe AI Chat"}
             )
 
-        @self.router.get("/dashboard", response_class=HTMLResponse)
-        async def dashboard(request: Request):
-            """Legacy dashboard (for reference)."""
-            return self.templates.TemplateResponse(
-                "dashboard.html", {"request": request, "title": "Anzen Dashboard"}
-            )
+        if self.debug:
+
+            @self.router.get("/dashboard", response_class=HTMLResponse)
+            async def dashboard(request: Request):
+                """Legacy dashboard (for reference, debug only)."""
+                return self.templates.TemplateResponse(
+                    request, "dashboard.html", {"title": "Anzen Dashboard"}
+                )
 
         @self.router.get("/api/config")
-        async def get_config():
+        async def get_config(request: Request):
             """Get client configuration."""
-            return {
-                "agent_url": self.agent_url,
-                "gateway_url": self.gateway_url,
-                "version": "0.1.0",
-            }
+            headers = {"ETag": self._config_etag, "Cache-Control": "public, max-age=60"}
+            if request.headers.get("if-none-match") == self._config_etag:
+                return Response(status_code=304, headers=headers)
+            return Response(
+                content=self._config_json,
+                media_type="application/json",
+                headers=headers,
+            )
@@ -7,22 +7,41 @@ Provides web UI for secure AI agent interactions and compliance reporting.
 
 import argparse
 import logging
+import os
 import sys
 from pathlib import Path
+from typing import Optional
 
+import orjson
 import uvicorn
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 
 from .app import AnzenClient
-from .config import get_settings
+from .config import Settings, get_settings
 
 
-def create_app() -> FastAPI:
-    """Create and configure the FastAPI application."""
-    settings = get_settings()
+class TemplateScripts(StaticFiles):
+    """Static file app exposing only the page scripts kept next to the templates."""
+
+    allowed = frozenset({"dashboard.js", "chat.js"})
+
+    def lookup_path(self, path: str):
+        if path not in self.allowed:
+            return "", None
+        return super().lookup_path(path)
+
+
+def create_app(settings: Optional[Settings] = None) -> FastAPI:
+    """
+    Create and configure the FastAPI application.
+
+    Args:
+        settings: Settings to use instead of the cached ``get_settings()``
+    """
+    settings = settings or get_settings()
 
     app = FastAPI(
         title="Anzen Client",
@@ -30,6 +49,7 @@ def create_app() -> FastAPI:
         version="0.1.0",
         docs_url="/docs" if settings.debug else None,
         redoc_url="/redoc" if settings.debug else None,
+        default_response_class=ORJSONResponse,
     )
 
     # Add CORS middleware
@@ -46,36 +66,27 @@ def create_app() -> FastAPI:
     if static_dir.exists():
         app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
-    # Serve JavaScript files from templates directory
-    templates_dir = Path(__file__).parent.parent.parent / "templates"
-
-    @app.get("/dashboard.js")
-    async def serve_dashboard_js():
-        js_file = templates_dir / "dashboard.js"
-        if js_file.exists():
-            return FileResponse(js_file, media_type="application/javascript")
-        raise HTTPException(status_code=404, detail="JavaScript file not found")
-
-    @app.get("/chat.js")
-    async def serve_chat_js():
-        js_file = templates_dir / "chat.js"
-        if js_file.exists():
-            return FileResponse(js_file, media_type="application/javascript")
-        raise HTTPException(status_code=404, detail="JavaScript file not found")
-
     # Initialize the client
     client = AnzenClient(
         agent_url=settings.agent_url,
         gateway_url=settings.gateway_url,
+        debug=settings.debug,
     )
 
     # Include the client routes
     app.include_router(client.router)
 
-    # Health check endpoint
+    # Health check endpoint; the body is constant, so serialize it once
+    health_body = orjson.dumps({"status": "healthy", "service": "anzen-client"})
+
     @app.get("/health")
     async def health_check():
-        return {"status": "healthy", "service": "anzen-client"}
+        return Response(content=health_body, media_type="application/json")
+
+    # Serve JavaScript files from templates directory; mounted last because
+    # it sits at the root and would otherwise shadow the routes above
+    templates_dir = Path(__file__).parent.parent.parent / "templates"
+    app.mount("/", TemplateScripts(directory=str(templates_dir)), name="scripts")
 
     return app
 
@@ -88,6 +99,12 @@ def main():
     parser.add_argument("--agent-url", help="URL of the Anzen Agent")
     parser.add_argument("--gateway-url", help="URL of the Anzen Safety Gateway")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (ignored with --reload)",
+    )
     parser.add_argument("--log-level", default="info", help="Log level")
 
     args = parser.parse_args()
@@ -98,25 +115,28 @@ def main():
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
 
-    # Set URLs if provided
+    # Set URLs if provided. uvicorn builds the app in each worker process
+    # through the factory, so the overrides travel as environment variables
     if args.agent_url:
-        import os
-
         os.environ["ANZEN_AGENT_URL"] = args.agent_url
     if args.gateway_url:
-        import os
-
         os.environ["ANZEN_GATEWAY_URL"] = args.gateway_url
+    get_settings.cache_clear()
 
-    # Create the app
-    app = create_app()
+    # uvloop (libuv event loop) is not available on Windows
+    loop = "uvloop" if sys.platform != "win32" else "auto"
 
-    # Run the server
+    # Run the server; reload and multiple workers need an import string, so
+    # each process builds its own app through the factory
     uvicorn.run(
-        app,
+        "anzen_client.main:create_app",
+        factory=True,
         host=args.host,
         port=args.port,
         reload=args.reload,
+        workers=None if args.reload else args.workers,
+        loop=loop,
+        http="httptools",
         log_level=args.log_level,
     )
 
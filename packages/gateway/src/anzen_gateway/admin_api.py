@@ -6,15 +6,21 @@ User management, API key management, and compliance reporting.
 
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, EmailStr
+from sqlalchemy import (Boolean, DateTime, case, func, literal_column, null,
+                        select, update)
 from sqlalchemy.orm import Session
 
 from .audit import AuditLogger
-from .auth import (AuthManager, authenticate_user, create_api_key, create_user,
-                   get_current_active_user)
+from .auth import (AuthCtx, AuthManager, auth_ctx, authenticate_user,
+                   create_api_key, create_user, invalidate_api_key,
+                   upgrade_password_hash)
 from .database import (APIKey, AuditLog, Organization, User,
                        get_database_session)
 
@@ -63,11 +69,66 @@ class ComplianceReportRequest(BaseModel):
     route_filter: Optional[str] = None
 
 
+def _update_last_login(user_id: str, bind):
+    """Stamp a user's last login in a short session of its own."""
+    try:
+        with Session(bind) as session:
+            session.execute(
+                update(User).where(User.id == user_id).values(last_login=func.now())
+            )
+            session.commit()
+    except Exception as e:
+        logger.error("Failed to update last login for user %s: %s", user_id, e)
+
+
+def _json_array(db: Session, fields: Dict[str, Any], *criteria) -> bytes:
+    """
+    Render matching rows as a JSON array inside the database.
+
+    PostgreSQL and SQLite aggregate the rows into a single JSON text value,
+    so no ORM objects or per-row dicts are built in Python. Other dialects
+    fall back to a column projection serialized with orjson.
+
+    Args:
+        db: Database session
+        fields: Output key -> column (or SQL expression)
+        *criteria: WHERE clauses
+
+    Returns:
+        JSON array as bytes
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        aggregate, build_object = func.json_agg, func.json_build_object
+    elif dialect == "sqlite":
+        aggregate, build_object = func.json_group_array, func.json_object
+    else:
+        rows = db.query(*fields.values()).filter(*criteria).all()
+        return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+    args = []
+    for name, column in fields.items():
+        if dialect == "sqlite":
+            # SQLite has no boolean/timestamp JSON types: emit true/false and
+            # the same ISO 8601 text the Python serializer produced
+            column_type = getattr(column, "type", None)
+            if isinstance(column_type, Boolean):
+                column = func.json(case((column, "true"), else_="false"))
+            elif isinstance(column_type, DateTime):
+                column = func.replace(column, " ", "T")
+        args.extend((literal_column(f"'{name}'"), column))
+
+    body = db.execute(select(aggregate(build_object(*args))).where(*criteria)).scalar()
+    return (body or "[]").encode("utf-8")
+
+
 class AdminAPI:
     """Admin API for user and organization management."""
 
     def __init__(self):
-        self.router = APIRouter(prefix="/admin", tags=["admin"])
+        self.router = APIRouter(
+            prefix="/admin", tags=["admin"], default_response_class=ORJSONResponse
+        )
         self._setup_routes()
 
     def _setup_routes(self):
@@ -75,42 +136,60 @@ class AdminAPI:
 
         @self.router.post("/login", response_model=LoginResponse)
         async def login(
-            request: LoginRequest, db: Session = Depends(get_database_session)
+            request: LoginRequest,
+            background_tasks: BackgroundTasks,
+            db: Session = Depends(get_database_session),
         ):
             """Authenticate user and return JWT token."""
-            user = authenticate_user(request.email, request.password, db)
+            # Password hashing takes tens of ms; keep it off the event loop
+            user = await run_in_threadpool(
+                authenticate_user, request.email, request.password, db
+            )
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Incorrect email or password",
                 )
 
-            # Update last login
-            user.last_login = datetime.now(timezone.utc)
-            db.commit()
+            user_info = {
+                "id": str(user.id),
+                "email": user.email,
+                "name": user.name,
+                "is_admin": user.is_admin,
+                "organization": user.organization.name,
+            }
+
+            # Record the login, and upgrade a legacy password hash, after the
+            # response has been sent
+            background_tasks.add_task(
+                _update_last_login, user_info["id"], db.get_bind()
+            )
+            if AuthManager.password_needs_rehash(user.hashed_password):
+                background_tasks.add_task(
+                    upgrade_password_hash,
+                    user_info["id"],
+                    request.password,
+                    db.get_bind(),
+                )
 
             # Create access token
-            access_token = AuthManager.create_access_token(data={"sub": str(user.id)})
+            access_token = AuthManager.create_access_token(
+                data={"sub": user_info["id"]}
+            )
 
             return LoginResponse(
                 access_token=access_token,
                 token_type="bearer",
-                user={
-                    "id": str(user.id),
-                    "email": user.email,
-                    "name": user.name,
-                    "is_admin": user.is_admin,
-                    "organization": user.organization.name,
-                },
+                user=user_info,
             )
 
         @self.router.post("/users", response_model=dict)
         async def create_new_user(
             request: CreateUserRequest,
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """Create a new user (admin only)."""
+            current_user, db = ctx.user, ctx.db
             if not current_user.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
@@ -132,7 +211,7 @@ class AdminAPI:
                     "email": user.email,
                     "name": user.name,
                     "is_admin": user.is_admin,
-                    "created_at": user.created_at.isoformat(),
+                    "created_at": user.created_at,
                 }
 
             except ValueError as e:
@@ -142,38 +221,32 @@ class AdminAPI:
 
         @self.router.get("/users", response_model=List[dict])
         async def list_users(
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """List users in the organization."""
-            users = (
-                db.query(User)
-                .filter(User.organization_id == current_user.organization_id)
-                .all()
-            )
-
-            return [
+            current_user, db = ctx.user, ctx.db
+            body = _json_array(
+                db,
                 {
-                    "id": str(user.id),
-                    "email": user.email,
-                    "name": user.name,
-                    "is_admin": user.is_admin,
-                    "is_active": user.is_active,
-                    "created_at": user.created_at.isoformat(),
-                    "last_login": (
-                        user.last_login.isoformat() if user.last_login else None
-                    ),
-                }
-                for user in users
-            ]
+                    "id": User.id,
+                    "email": User.email,
+                    "name": User.name,
+                    "is_admin": User.is_admin,
+                    "is_active": User.is_active,
+                    "created_at": User.created_at,
+                    "last_login": User.last_login,
+                },
+                User.organization_id == current_user.organization_id,
+            )
+            return Response(content=body, media_type="application/json")
 
         @self.router.post("/api-keys", response_model=APIKeyResponse)
         async def create_new_api_key(
             request: CreateAPIKeyRequest,
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """Create a new API key."""
+            current_user, db = ctx.user, ctx.db
             full_key, api_key_record = create_api_key(
                 name=request.name,
                 user_id=str(current_user.id),
@@ -196,33 +269,34 @@ class AdminAPI:
 
         @self.router.get("/api-keys", response_model=List[APIKeyResponse])
         async def list_api_keys(
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """List API keys for the current user."""
-            api_keys = db.query(APIKey).filter(APIKey.user_id == current_user.id).all()
-
-            return [
-                APIKeyResponse(
-                    id=str(key.id),
-                    name=key.name,
-                    key_prefix=key.key_prefix,
-                    created_at=key.created_at,
-                    expires_at=key.expires_at,
-                    last_used=key.last_used,
-                    usage_count=key.usage_count,
-                    is_active=key.is_active,
-                )
-                for key in api_keys
-            ]
+            current_user, db = ctx.user, ctx.db
+            body = _json_array(
+                db,
+                {
+                    "id": APIKey.id,
+                    "name": APIKey.name,
+                    "key_prefix": APIKey.key_prefix,
+                    "api_key": null(),
+                    "created_at": APIKey.created_at,
+                    "expires_at": APIKey.expires_at,
+                    "last_used": APIKey.last_used,
+                    "usage_count": APIKey.usage_count,
+                    "is_active": APIKey.is_active,
+                },
+                APIKey.user_id == current_user.id,
+            )
+            return Response(content=body, media_type="application/json")
 
         @self.router.delete("/api-keys/{key_id}")
         async def delete_api_key(
             key_id: str,
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """Delete an API key."""
+            current_user, db = ctx.user, ctx.db
             api_key = (
                 db.query(APIKey)
                 .filter(APIKey.id == key_id, APIKey.user_id == current_user.id)
@@ -236,16 +310,17 @@ class AdminAPI:
 
             api_key.is_active = False
             db.commit()
+            invalidate_api_key(api_key.key_hash)
 
             return {"message": "API key deleted successfully"}
 
         @self.router.post("/reports/compliance")
         async def generate_compliance_report(
             request: ComplianceReportRequest,
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """Generate a compliance report."""
+            current_user, db = ctx.user, ctx.db
             audit_logger = AuditLogger(db)
 
             report = audit_logger.get_compliance_report(
@@ -261,10 +336,10 @@ class AdminAPI:
         async def get_recent_logs(
             limit: int = 100,
             route_filter: Optional[str] = None,
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """Get recent audit logs."""
+            current_user, db = ctx.user, ctx.db
             audit_logger = AuditLogger(db)
 
             logs = audit_logger.get_recent_logs(
@@ -277,47 +352,42 @@ class AdminAPI:
 
         @self.router.get("/dashboard/stats")
         async def get_dashboard_stats(
-            current_user: User = Depends(get_current_active_user),
-            db: Session = Depends(get_database_session),
+            ctx: AuthCtx = Depends(auth_ctx),
         ):
             """Get dashboard statistics."""
+            current_user, db = ctx.user, ctx.db
+            # Resolve the organization up front, while the user row is fresh
+            organization = current_user.organization
+            organization_id = current_user.organization_id
+
             # Get stats for the last 24 hours
             end_date = datetime.now(timezone.utc)
             start_date = end_date - timedelta(days=1)
 
             audit_logger = AuditLogger(db)
             report = audit_logger.get_compliance_report(
-                organization_id=str(current_user.organization_id),
+                organization_id=str(organization_id),
                 start_date=start_date,
                 end_date=end_date,
             )
 
-            # Get user count
-            user_count = (
-                db.query(User)
-                .filter(
-                    User.organization_id == current_user.organization_id,
-                    User.is_active == True,
-                )
-                .count()
-            )
-
-            # Get API key count
-            api_key_count = (
-                db.query(APIKey)
-                .filter(
-                    APIKey.organization_id == current_user.organization_id,
-                    APIKey.is_active == True,
-                )
-                .count()
-            )
+            # Get active user and API key counts in one round trip; scalar
+            # subqueries avoid the row multiplication of joining both tables
+            user_count, api_key_count = db.query(
+                select(func.count(User.id))
+                .where(User.organization_id == organization_id, User.is_active)
+                .scalar_subquery(),
+                select(func.count(APIKey.id))
+                .where(APIKey.organization_id == organization_id, APIKey.is_active)
+                .scalar_subquery(),
+            ).one()
 
             return {
                 "last_24h": report["summary"],
                 "user_count": user_count,
                 "api_key_count": api_key_count,
                 "organization": {
-                    "name": current_user.organization.name,
-                    "slug": current_user.organization.slug,
+                    "name": organization.name,
+                    "slug": organization.slug,
                 },
             }
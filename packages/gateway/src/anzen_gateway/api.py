@@ -4,14 +4,19 @@ Anzen Safety Gateway API
 FastAPI application for PII detection and masking using NeMo Guardrails and Presidio.
 """
 
+import asyncio
 import logging
+import secrets
 import time
-import uuid
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
 from fastapi import APIRouter, HTTPException
 
-from .presidio_actuator import PresidioActuator
+from .presidio_actuator import (HIGH_RISK, MEDIUM_RISK, PresidioActuator,
+                                get_presidio_actuator)
 
 logger = logging.getLogger(__name__)
 # Try to import NeMo Guardrails, handle if not available
@@ -20,7 +25,7 @@ try:
 
     NEMO_AVAILABLE = True
 except Exception as e:
-    logger.warning(f"NeMo Guardrails not available: {e}")
+    logger.warning("NeMo Guardrails not available: %s", e)
     NEMO_AVAILABLE = False
 
     # Mock classes for when NeMo is not available
@@ -40,7 +45,9 @@ except Exception as e:
             return {}
 
 
-from .models import EntityInfo, SafetyCheckRequest, SafetyCheckResponse
+from .models import (EntityInfo, SafetyCheckBatchRequest,
+                     SafetyCheckBatchResponse, SafetyCheckRequest,
+                     SafetyCheckResponse)
 
 # Temporarily disable database dependencies for demo
 # from .database import get_database_session, APIKey, User, Organization
@@ -53,15 +60,97 @@ logger = logging.getLogger(__name__)
 logger.info("Using enhanced mock Presidio for demo purposes")
 PRESIDIO_AVAILABLE = False
 
+# Redacted even on permissive internal routes
+INTERNAL_BLOCKERS = frozenset({"CREDIT_CARD", "US_SSN"})
+
+
+def _policy_public(types: Set[str], risk_level: str) -> str:
+    # Public routes: strict policy; high-risk entities always block
+    if risk_level == "high" or types & HIGH_RISK:
+        return "BLOCK"
+    elif risk_level == "medium":
+        return "REDACT"
+    return "ALLOW"
+
+
+def _policy_private(types: Set[str], risk_level: str) -> str:
+    # Private routes: moderate policy
+    if risk_level == "high" and types & HIGH_RISK:
+        return "BLOCK"
+    elif risk_level in ("high", "medium"):
+        return "REDACT"
+    return "ALLOW"
+
+
+def _policy_internal(types: Set[str], risk_level: str) -> str:
+    # Internal routes: permissive policy
+    if types & INTERNAL_BLOCKERS:
+        return "REDACT"
+    return "ALLOW"
+
+
+# Any other route prefix gets the internal policy
+POLICIES: Dict[str, Callable[[Set[str], str], str]] = {
+    "public": _policy_public,
+    "private": _policy_private,
+}
+
+
+@lru_cache(maxsize=1024)
+def _route_policy(route: str) -> Callable[[Set[str], str], str]:
+    route_type = route.split(":", 1)[0] if ":" in route else "public"
+    return POLICIES.get(route_type, _policy_internal)
+
+
+# Mock organization and user for demo (no database lookups)
+DEMO_ORGANIZATION = SimpleNamespace(slug="demo-org", id="demo-org-id")
+DEMO_USER = SimpleNamespace(email="demo@example.com")
+
+# Response metadata "processing_method" values
+METHOD_NEMO = "nemo"
+METHOD_DIRECT = "direct"
+METHOD_OUTPUT_REDACTION = "output_redaction"
+
+# Below this size a scan costs less than the hop to a worker process
+OFFLOAD_MIN_CHARS = 1024
+
+# Per-process actuator for the CPU pool workers
+_worker_presidio: Optional[PresidioActuator] = None
+
+
+def _init_worker():
+    global _worker_presidio
+    _worker_presidio = get_presidio_actuator()
+
+
+def _detect_pii(text: str, language: str) -> List[Dict[str, Any]]:
+    return _worker_presidio.detect_pii(text, language)
+
+
+def _anonymize_text(text: str, entities: List[Dict[str, Any]]) -> str:
+    return _worker_presidio.anonymize_text(text, entities)
+
 
 class AnzenGateway:
     """Anzen Safety Gateway main class."""
 
-    def __init__(self, config_path: str = "./config"):
+    def __init__(self, config_path: str = "./config", cpu_workers: int = 1):
+        """
+        Args:
+            config_path: NeMo Guardrails config directory
+            cpu_workers: Processes for offloaded PII scans; every server
+                process gets its own pool, so keep the total near the CPU count
+        """
         self.config_path = config_path
         self.router = APIRouter()
         self.rails: Optional[LLMRails] = None
-        self.presidio = PresidioActuator()
+        self.presidio = get_presidio_actuator()
+
+        # PII scanning is CPU-bound pure Python, so large texts go to worker
+        # processes instead of blocking the event loop (started on first use)
+        self._cpu_pool = ProcessPoolExecutor(
+            max_workers=max(1, cpu_workers), initializer=_init_worker
+        )
 
         self._setup_rails()
         self._setup_routes()
@@ -72,43 +161,70 @@ class AnzenGateway:
         logger.info("Demo mode: Using direct Presidio without NeMo Guardrails")
         self.rails = None
 
-    def _assess_policy_decision(
-        self, entities: list, risk_level: str, route: str
-    ) -> str:
-        """Assess policy decision based on entities, risk level, and route."""
-        route_type = route.split(":")[0] if ":" in route else "public"
-
-        # High-risk entities that should always be blocked in public routes
-        high_risk_types = ["CREDIT_CARD", "US_SSN", "US_PASSPORT", "IBAN_CODE"]
-
-        if route_type == "public":
-            # Public routes: strict policy
-            if risk_level == "high":
-                return "BLOCK"
-            elif any(entity["type"] in high_risk_types for entity in entities):
-                return "BLOCK"
-            elif risk_level == "medium":
-                return "REDACT"
-            else:
-                return "ALLOW"
-
-        elif route_type == "private":
-            # Private routes: moderate policy
-            if risk_level == "high" and any(
-                entity["type"] in high_risk_types for entity in entities
-            ):
-                return "BLOCK"
-            elif risk_level in ["high", "medium"]:
-                return "REDACT"
-            else:
-                return "ALLOW"
-
-        else:  # internal routes
-            # Internal routes: permissive policy
-            if any(entity["type"] in ["CREDIT_CARD", "US_SSN"] for entity in entities):
-                return "REDACT"
-            else:
-                return "ALLOW"
+    async def _detect_pii(self, text: str, language: str) -> List[Dict[str, Any]]:
+        """Detect PII, off the event loop for large texts."""
+        if len(text) < OFFLOAD_MIN_CHARS:
+            return self.presidio.detect_pii(text, language)
+        return await self._run_cpu(_detect_pii, text, language)
+
+    async def _anonymize_text(self, text: str, entities: List[Dict[str, Any]]) -> str:
+        """Anonymize PII, off the event loop for large texts."""
+        if len(text) < OFFLOAD_MIN_CHARS:
+            return self.presidio.anonymize_text(text, entities)
+        return await self._run_cpu(_anonymize_text, text, entities)
+
+    async def _run_cpu(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_pool, fn, *args)
+
+    def close(self):
+        """Stop the PII worker processes."""
+        self._cpu_pool.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _summarize_entities(
+        entities: list,
+    ) -> Tuple[List[EntityInfo], Set[str], str]:
+        """
+        Walk detected entities once for everything the handlers need.
+
+        Returns:
+            (response entity infos, set of entity types, risk level)
+        """
+        entity_infos = []
+        types = set()
+        max_high = max_medium = 0.0
+        for entity in entities:
+            entity_type, score = entity["type"], entity["score"]
+            types.add(entity_type)
+            # Presidio output is already well-typed, so skip validation
+            entity_infos.append(
+                EntityInfo.model_construct(
+                    type=entity_type,
+                    start=entity["start"],
+                    end=entity["end"],
+                    score=score,
+                    text=entity["text"],
+                )
+            )
+            if entity_type in HIGH_RISK:
+                if score > max_high:
+                    max_high = score
+            elif entity_type in MEDIUM_RISK and score > max_medium:
+                max_medium = score
+
+        if max_high >= 0.8:
+            risk_level = "high"
+        elif max_medium >= 0.6:
+            risk_level = "medium"
+        else:
+            risk_level = "low"
+        return entity_infos, types, risk_level
+
+    @staticmethod
+    def _decide(types: Set[str], risk_level: str, route: str) -> str:
+        """Assess policy decision based on entity types, risk level, and route."""
+        return _route_policy(route)(types, risk_level)
 
     def _setup_routes(self):
         """Setup API routes."""
@@ -116,18 +232,18 @@ class AnzenGateway:
         @self.router.post("/anzen/check/input", response_model=SafetyCheckResponse)
         async def check_input(request: SafetyCheckRequest):
             """Check and mask input text for PII."""
-            trace_id = str(uuid.uuid4())
+            trace_id = secrets.token_hex(16)
             start_time = time.time()
             # Mock organization for demo
-            organization = type(
-                "obj", (object,), {"slug": "demo-org", "id": "demo-org-id"}
-            )()
-            user = type("obj", (object,), {"email": "demo@example.com"})()
+            organization = DEMO_ORGANIZATION
+            user = DEMO_USER
             api_key = None
 
             try:
                 logger.info(
-                    f"Processing input check - trace_id: {trace_id}, org: {organization.slug}"
+                    "Processing input check - trace_id: %s, org: %s",
+                    trace_id,
+                    organization.slug,
                 )
 
                 if self.rails:
@@ -138,7 +254,7 @@ class AnzenGateway:
 
                     # Extract results from NeMo execution context
                     entities = []
-                    risk_level = "low"
+                    context_risk_level = None
                     safe_text = request.text
 
                     # Try to get results from NeMo context
@@ -147,45 +263,35 @@ class AnzenGateway:
                     ):
                         context_data = self.rails.runtime.context.get_data()
                         entities = context_data.get("entities", [])
-                        risk_level = context_data.get("risk_level", "low")
+                        context_risk_level = context_data.get("risk_level", "low")
                         safe_text = context_data.get("safe_text", request.text)
 
                     # If no results from NeMo, fall back to direct Presidio
                     if not entities:
-                        entities = self.presidio.detect_pii(
+                        entities = await self._detect_pii(
                             request.text, request.language
                         )
-                        risk_level = self._assess_risk_level(entities)
+                        context_risk_level = None
 
                 else:
                     # Direct Presidio processing
-                    entities = self.presidio.detect_pii(request.text, request.language)
-                    risk_level = self._assess_risk_level(entities)
+                    entities = await self._detect_pii(request.text, request.language)
+                    context_risk_level = None
                     safe_text = request.text
 
-                # Convert entities to our format
-                entity_infos = [
-                    EntityInfo(
-                        type=e["type"],
-                        start=e["start"],
-                        end=e["end"],
-                        score=e["score"],
-                        text=e["text"],
-                    )
-                    for e in entities
-                ]
+                # Convert entities to our format and assess risk in one pass
+                entity_infos, types, risk_level = self._summarize_entities(entities)
+                if context_risk_level is not None:
+                    risk_level = context_risk_level
 
                 # Make policy decision
-                decision = self._assess_policy_decision(
-                    entities, risk_level, request.route
-                )
-
-                # Apply anonymization if needed
-                if decision in ["REDACT", "BLOCK"]:
-                    safe_text = self.presidio.anonymize_text(request.text, entities)
+                decision = self._decide(types, risk_level, request.route)
 
-                # For BLOCK decisions, don't return the safe text
-                if decision == "BLOCK":
+                # Apply anonymization if needed; BLOCK never returns the text,
+                # so masking it would be wasted work
+                if decision == "REDACT":
+                    safe_text = await self._anonymize_text(request.text, entities)
+                elif decision == "BLOCK":
                     safe_text = "[BLOCKED: Contains sensitive information]"
 
                 response = SafetyCheckResponse(
@@ -198,7 +304,9 @@ class AnzenGateway:
                         "route": request.route,
                         "language": request.language,
                         "entity_count": len(entities),
-                        "processing_method": "nemo" if self.rails else "direct",
+                        "processing_method": (
+                            METHOD_NEMO if self.rails else METHOD_DIRECT
+                        ),
                         "organization": organization.slug,
                         "user": user.email,
                     },
@@ -207,56 +315,61 @@ class AnzenGateway:
                 # Audit logging (disabled for demo)
                 # audit_logger = AuditLogger(db)
                 # await self._log_audit_async(...)
-                logger.info(f"Demo mode: audit logging disabled")
+                logger.info("Demo mode: audit logging disabled")
 
                 logger.info(
-                    f"Input check completed - decision: {decision}, entities: {len(entities)}, risk: {risk_level}"
+                    "Input check completed - decision: %s, entities: %d, risk: %s",
+                    decision,
+                    len(entities),
+                    risk_level,
                 )
                 return response
 
             except Exception as e:
-                logger.error(f"Input check failed - trace_id: {trace_id}, error: {e}")
+                logger.error(
+                    "Input check failed - trace_id: %s, error: %s", trace_id, e
+                )
                 raise HTTPException(
                     status_code=500, detail=f"Safety check failed: {str(e)}"
                 )
 
+        @self.router.post(
+            "/anzen/check/input/batch", response_model=SafetyCheckBatchResponse
+        )
+        async def check_input_batch(request: SafetyCheckBatchRequest):
+            """Check and mask several input texts in one request."""
+            results = await asyncio.gather(
+                *(check_input(item) for item in request.items)
+            )
+            return SafetyCheckBatchResponse(results=results)
+
         @self.router.post("/anzen/check/output", response_model=SafetyCheckResponse)
         async def check_output(request: SafetyCheckRequest):
             """Check and mask output text for PII."""
-            trace_id = str(uuid.uuid4())
+            trace_id = secrets.token_hex(16)
             start_time = time.time()
             # Mock organization for demo
-            organization = type(
-                "obj", (object,), {"slug": "demo-org", "id": "demo-org-id"}
-            )()
-            user = type("obj", (object,), {"email": "demo@example.com"})()
+            organization = DEMO_ORGANIZATION
+            user = DEMO_USER
             api_key = None
 
             try:
                 logger.info(
-                    f"Processing output check - trace_id: {trace_id}, org: {organization.slug}"
+                    "Processing output check - trace_id: %s, org: %s",
+                    trace_id,
+                    organization.slug,
                 )
 
                 # For output, we always redact PII regardless of route
-                entities = self.presidio.detect_pii(request.text, request.language)
-                risk_level = self._assess_risk_level(entities)
-
-                # Convert entities to our format
-                entity_infos = [
-                    EntityInfo(
-                        type=e["type"],
-                        start=e["start"],
-                        end=e["end"],
-                        score=e["score"],
-                        text=e["text"],
-                    )
-                    for e in entities
-                ]
+                entities = await self._detect_pii(request.text, request.language)
+
+                # Convert entities to our format and assess risk in one pass
+                entity_infos, _, risk_level = self._summarize_entities(entities)
 
                 # Always redact PII in outputs
                 decision = "REDACT" if entities else "ALLOW"
                 safe_text = (
-                    self.presidio.anonymize_text(request.text, entities)
+                    await self._anonymize_text(request.text, entities)
                     if entities
                     else request.text
                 )
@@ -271,7 +384,7 @@ class AnzenGateway:
                         "route": request.route,
                         "language": request.language,
                         "entity_count": len(entities),
-                        "processing_method": "output_redaction",
+                        "processing_method": METHOD_OUTPUT_REDACTION,
                         "organization": organization.slug,
                         "user": user.email,
                     },
@@ -280,38 +393,23 @@ class AnzenGateway:
                 # Audit logging (disabled for demo)
                 # audit_logger = AuditLogger(db)
                 # await self._log_audit_async(...)
-                logger.info(f"Demo mode: audit logging disabled")
+                logger.info("Demo mode: audit logging disabled")
 
                 logger.info(
-                    f"Output check completed - decision: {decision}, entities: {len(entities)}, risk: {risk_level}"
+                    "Output check completed - decision: %s, entities: %d, risk: %s",
+                    decision,
+                    len(entities),
+                    risk_level,
                 )
                 return response
 
             except Exception as e:
-                logger.error(f"Output check failed - trace_id: {trace_id}, error: {e}")
+                logger.error(
+                    "Output check failed - trace_id: %s, error: %s", trace_id, e
+                )
                 raise HTTPException(
                     status_code=500, detail=f"Safety check failed: {str(e)}"
                 )
 
-    def _assess_risk_level(self, entities: list) -> str:
-        """Assess risk level based on detected entities."""
-        if not entities:
-            return "low"
-
-        high_risk_entities = ["CREDIT_CARD", "US_SSN", "US_PASSPORT", "IBAN_CODE"]
-        medium_risk_entities = ["EMAIL_ADDRESS", "PHONE_NUMBER", "PERSON"]
-
-        # Check for high-risk entities
-        for entity in entities:
-            if entity["type"] in high_risk_entities and entity["score"] >= 0.8:
-                return "high"
-
-        # Check for medium-risk entities
-        for entity in entities:
-            if entity["type"] in medium_risk_entities and entity["score"] >= 0.6:
-                return "medium"
-
-        return "low"
-
     # Audit logging method disabled for demo
     # async def _log_audit_async(...): pass
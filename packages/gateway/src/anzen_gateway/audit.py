@@ -4,25 +4,219 @@ Audit logging service for Anzen Gateway
 Compliance-focused logging with data minimization and privacy protection.
 """
 
+import asyncio
 import hashlib
 import json
 import logging
 import time
+import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Union
 
+from blake3 import blake3
+from sqlalchemy import case, func, insert, select, true
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
 
-from .database import AuditLog, Organization
+from .database import AuditLog, Organization, get_database_manager
 
 logger = logging.getLogger(__name__)
 
+# Audit rows written before the switch to BLAKE3 carry SHA-256 digests
+_sha256 = hashlib.sha256
+
+# Above this size BLAKE3's multithreaded tree mode outruns a single core
+_BLAKE3_THREADED_MIN_BYTES = 1 << 20
+
+# Columns exposed by get_recent_logs (no text hashes), in response order
+_RECENT_LOG_COLUMNS = (
+    AuditLog.id,
+    AuditLog.trace_id,
+    AuditLog.route,
+    AuditLog.method,
+    AuditLog.entities_detected,
+    AuditLog.entity_count,
+    AuditLog.risk_level,
+    AuditLog.decision,
+    AuditLog.text_length,
+    AuditLog.processing_time_ms,
+    AuditLog.created_at,
+    AuditLog.extra_metadata.label("metadata"),
+)
+
+# Per-route counter incremented for each policy decision
+_ROUTE_COUNTERS = {"BLOCK": "blocked", "REDACT": "redacted", "ALLOW": "allowed"}
+
+# Queued by AuditBatchWriter.close to stop the consumer after earlier rows
+_STOP = object()
+
+
+@lru_cache(maxsize=256)
+def _route_clause(route_filter: str) -> ColumnElement:
+    """
+    Build (once per distinct filter) the SQL condition for a route filter.
+
+    ``*`` is a wildcard (e.g. "public:*"); anything else must match exactly.
+    """
+    if "*" not in route_filter:
+        return AuditLog.route == route_filter
+    pattern = (
+        route_filter.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+        .replace("*", "%")
+    )
+    return AuditLog.route.like(pattern, escape="\\")
+
+
+class AuditBatchWriter:
+    """Background batch inserter for audit log rows."""
+
+    def __init__(
+        self,
+        session_factory: Optional[async_sessionmaker] = None,
+        batch_size: int = 500,
+        flush_interval: float = 0.1,
+        maxsize: int = 10_000,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.maxsize = maxsize
+
+        # Queue and consumer task are created lazily on the running loop
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    @property
+    def session_factory(self) -> async_sessionmaker:
+        if self._session_factory is None:
+            self._session_factory = get_database_manager().async_session_factory
+        return self._session_factory
+
+    def submit(self, row: Dict[str, Any]):
+        """
+        Queue a row for insertion; must be called on the event loop.
+
+        Rows are dropped (and logged) if the queue is full, so a stalled
+        database cannot grow memory without bound.
+        """
+        if self._consumer is None or self._consumer.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.maxsize)
+            self._consumer = asyncio.get_running_loop().create_task(self._run())
+
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            logger.error("Audit queue full, dropping audit log %s", row["trace_id"])
+
+    async def _run(self):
+        """Insert every ``batch_size`` rows or ``flush_interval`` seconds."""
+        loop = asyncio.get_running_loop()
+        queue = self._queue
+        while True:
+            row = await queue.get()
+            if row is _STOP:
+                return
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Dict[str, Any]]):
+        """
+        Insert a batch with one executemany round trip.
+
+        If the batch fails, rows are retried one at a time so a single bad
+        row only loses itself.
+        """
+        try:
+            async with self.session_factory() as session:
+                await session.execute(insert(AuditLog), batch)
+                await session.commit()
+            logger.debug("Inserted %d audit logs", len(batch))
+            return
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(
+                    "Failed to insert audit log %s: %s", batch[0].get("trace_id"), e
+                )
+                return
+            logger.warning(
+                "Failed to insert %d audit logs, retrying one by one: %s",
+                len(batch),
+                e,
+            )
+
+        for row in batch:
+            await self._flush([row])
+
+    async def close(self):
+        """Stop the consumer once it has inserted everything queued so far."""
+        if self._consumer is not None:
+            if not self._consumer.done():
+                # Queued behind pending rows, so the consumer flushes its
+                # current batch and drains the queue before it exits
+                await self._queue.put(_STOP)
+            try:
+                await self._consumer
+            except Exception as e:
+                logger.error("Audit writer stopped with an error: %s", e)
+            self._consumer = None
+
+        if self._queue is not None:
+            # Rows left behind if the consumer died before reaching them
+            batch = []
+            while not self._queue.empty():
+                row = self._queue.get_nowait()
+                if row is _STOP:
+                    continue
+                batch.append(row)
+                if len(batch) == self.batch_size:
+                    await self._flush(batch)
+                    batch = []
+            if batch:
+                await self._flush(batch)
+
+
+@lru_cache(maxsize=1)
+def get_audit_writer() -> AuditBatchWriter:
+    """Get the process-wide audit batch writer."""
+    return AuditBatchWriter()
+
 
 class AuditLogger:
     """Audit logging service with privacy protection."""
 
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Optional[Session] = None,
+        writer: Optional[AuditBatchWriter] = None,
+    ):
+        """
+        Args:
+            db: Sync session used for reports and log queries
+            writer: Batch writer for audit rows (defaults to the shared one)
+        """
         self.db = db
+        self.writer = writer or get_audit_writer()
 
     def log_safety_check(
         self,
@@ -38,10 +232,13 @@ class AuditLogger:
         processing_time_ms: float,
         session_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> AuditLog:
+    ) -> Dict[str, Any]:
         """
         Log a safety check event with privacy protection.
 
+        The row is queued for the background batch writer; this returns
+        without waiting for the database.
+
         Args:
             trace_id: Unique trace identifier
             organization_id: Organization UUID
@@ -57,7 +254,7 @@ class AuditLogger:
             metadata: Additional metadata
 
         Returns:
-            Created audit log record
+            Queued audit log row
         """
         try:
             # Hash text for privacy (no raw PII stored)
@@ -67,34 +264,37 @@ class AuditLogger:
             # Extract entity types only (no actual PII text)
             entity_types = [entity.get("type", "UNKNOWN") for entity in entities]
 
-            # Create audit log entry
-            audit_log = AuditLog(
-                trace_id=trace_id,
-                session_id=session_id,
-                organization_id=organization_id,
-                route=route,
-                method=method,
-                entities_detected=entity_types,
-                entity_count=len(entities),
-                risk_level=risk_level,
-                decision=decision,
-                input_hash=input_hash,
-                output_hash=output_hash,
-                text_length=len(input_text),
-                processing_time_ms=processing_time_ms,
-                extra_metadata=metadata or {},
-            )
+            # Create audit log entry; every row carries the same keys so a
+            # batch is one executemany, and is stamped now rather than when
+            # the batch is flushed
+            audit_log = {
+                "id": str(uuid.uuid4()),
+                "trace_id": trace_id,
+                "session_id": session_id,
+                "organization_id": organization_id,
+                "route": route,
+                "method": method,
+                "entities_detected": entity_types,
+                "entity_count": len(entities),
+                "risk_level": risk_level,
+                "decision": decision,
+                "input_hash": input_hash,
+                "output_hash": output_hash,
+                "text_length": len(input_text),
+                "processing_time_ms": processing_time_ms,
+                "created_at": datetime.now(timezone.utc),
+                "extra_metadata": metadata or {},
+            }
 
-            self.db.add(audit_log)
-            self.db.commit()
-            self.db.refresh(audit_log)
+            self.writer.submit(audit_log)
 
-            logger.info(f"Audit log created: {trace_id} - {decision} ({risk_level})")
+            logger.info(
+                "Audit log queued: %s - %s (%s)", trace_id, decision, risk_level
+            )
             return audit_log
 
         except Exception as e:
-            logger.error(f"Failed to create audit log: {e}")
-            self.db.rollback()
+            logger.error("Failed to create audit log: %s", e)
             raise
 
     def get_compliance_report(
@@ -117,60 +317,63 @@ class AuditLogger:
             Compliance report data
         """
         try:
-            # Base query
-            query = self.db.query(AuditLog).filter(
+            criteria = [
                 AuditLog.organization_id == organization_id,
                 AuditLog.created_at >= start_date,
                 AuditLog.created_at <= end_date,
-            )
-
-            # Apply route filter if provided
+            ]
             if route_filter:
-                if route_filter.endswith("*"):
-                    route_prefix = route_filter[:-1]
-                    query = query.filter(AuditLog.route.like(f"{route_prefix}%"))
-                else:
-                    query = query.filter(AuditLog.route == route_filter)
-
-            logs = query.all()
-
-            # Calculate metrics
-            total_requests = len(logs)
-            blocked_requests = len([log for log in logs if log.decision == "BLOCK"])
-            redacted_requests = len([log for log in logs if log.decision == "REDACT"])
-            allowed_requests = len([log for log in logs if log.decision == "ALLOW"])
-
-            # PII type analysis
-            pii_types = {}
-            for log in logs:
-                for entity_type in log.entities_detected:
-                    pii_types[entity_type] = pii_types.get(entity_type, 0) + 1
+                criteria.append(_route_clause(route_filter))
+
+            # One grouped scan yields decisions, routes, risk levels and
+            # timings; only O(groups) rows come back to Python
+            groups = self.db.execute(
+                select(
+                    AuditLog.route,
+                    AuditLog.decision,
+                    AuditLog.risk_level,
+                    func.count(),
+                    func.sum(AuditLog.processing_time_ms),
+                    # Timed rows only, i.e. non-null and non-zero
+                    func.count(case((AuditLog.processing_time_ms != 0, 1))),
+                )
+                .where(*criteria)
+                .group_by(AuditLog.route, AuditLog.decision, AuditLog.risk_level)
+            )
 
-            # Route analysis
+            total_requests = 0
+            decisions = {"BLOCK": 0, "REDACT": 0, "ALLOW": 0}
             routes = {}
-            for log in logs:
-                route = log.route
-                if route not in routes:
-                    routes[route] = {
+            risk_levels = {"low": 0, "medium": 0, "high": 0}
+            processing_count = 0
+            total_processing_time = 0.0
+
+            for route_name, decision, risk_level, count, time_sum, timed in groups:
+                total_requests += count
+                decisions[decision] = decisions.get(decision, 0) + count
+                risk_levels[risk_level] = risk_levels.get(risk_level, 0) + count
+
+                route = routes.get(route_name)
+                if route is None:
+                    route = routes[route_name] = {
                         "total": 0,
                         "blocked": 0,
                         "redacted": 0,
                         "allowed": 0,
                     }
-                routes[route]["total"] += 1
-                routes[route][log.decision.lower()] += 1
+                route["total"] += count
+                route[_ROUTE_COUNTERS[decision]] += count
 
-            # Risk level analysis
-            risk_levels = {"low": 0, "medium": 0, "high": 0}
-            for log in logs:
-                risk_levels[log.risk_level] = risk_levels.get(log.risk_level, 0) + 1
+                processing_count += timed
+                total_processing_time += time_sum or 0.0
 
-            # Performance metrics
-            processing_times = [
-                log.processing_time_ms for log in logs if log.processing_time_ms
-            ]
+            pii_types = self._count_entity_types(criteria)
+
+            blocked_requests = decisions["BLOCK"]
+            redacted_requests = decisions["REDACT"]
+            allowed_requests = decisions["ALLOW"]
             avg_processing_time = (
-                sum(processing_times) / len(processing_times) if processing_times else 0
+                total_processing_time / processing_count if processing_count else 0
             )
 
             report = {
@@ -195,17 +398,19 @@ class AuditLogger:
                 "risk_levels": risk_levels,
                 "performance": {
                     "avg_processing_time_ms": avg_processing_time,
-                    "total_processing_time_ms": sum(processing_times),
+                    "total_processing_time_ms": total_processing_time,
                 },
             }
 
             logger.info(
-                f"Generated compliance report for org {organization_id}: {total_requests} requests"
+                "Generated compliance report for org %s: %d requests",
+                organization_id,
+                total_requests,
             )
             return report
 
         except Exception as e:
-            logger.error(f"Failed to generate compliance report: {e}")
+            logger.error("Failed to generate compliance report: %s", e)
             raise
 
     def get_recent_logs(
@@ -223,53 +428,91 @@ class AuditLogger:
             List of recent audit logs (sanitized)
         """
         try:
-            query = (
-                self.db.query(AuditLog)
-                .filter(AuditLog.organization_id == organization_id)
-                .order_by(AuditLog.created_at.desc())
-                .limit(limit)
+            # Sanitized columns only, read as plain rows without ORM objects
+            stmt = select(*_RECENT_LOG_COLUMNS).where(
+                AuditLog.organization_id == organization_id
             )
 
             if route_filter:
-                if route_filter.endswith("*"):
-                    route_prefix = route_filter[:-1]
-                    query = query.filter(AuditLog.route.like(f"{route_prefix}%"))
-                else:
-                    query = query.filter(AuditLog.route == route_filter)
+                stmt = stmt.where(_route_clause(route_filter))
 
-            logs = query.all()
+            # Newest first, walking ix_audit_logs_org_created backwards
+            stmt = stmt.order_by(AuditLog.created_at.desc()).limit(limit)
 
-            # Sanitize logs (remove hashes, keep only metadata)
             sanitized_logs = []
-            for log in logs:
-                sanitized_log = {
-                    "id": str(log.id),
-                    "trace_id": log.trace_id,
-                    "route": log.route,
-                    "method": log.method,
-                    "entities_detected": log.entities_detected,
-                    "entity_count": log.entity_count,
-                    "risk_level": log.risk_level,
-                    "decision": log.decision,
-                    "text_length": log.text_length,
-                    "processing_time_ms": log.processing_time_ms,
-                    "created_at": log.created_at.isoformat(),
-                    "metadata": log.extra_metadata,
-                }
+            rows = self.db.execute(stmt.execution_options(yield_per=500)).mappings()
+            for row in rows:
+                sanitized_log = dict(row)
+                sanitized_log["id"] = str(row["id"])
+                sanitized_log["created_at"] = row["created_at"].isoformat()
                 sanitized_logs.append(sanitized_log)
 
             return sanitized_logs
 
         except Exception as e:
-            logger.error(f"Failed to get recent logs: {e}")
+            logger.error("Failed to get recent logs: %s", e)
             raise
 
+    def _count_entity_types(self, criteria: List[ColumnElement]) -> Dict[str, int]:
+        """Histogram of detected entity types over the matching audit logs."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            elements = func.json_array_elements_text(AuditLog.entities_detected)
+        elif dialect == "sqlite":
+            elements = func.json_each(AuditLog.entities_detected)
+        else:
+            # No JSON table function: count in Python over a streamed column
+            pii_types: Dict[str, int] = {}
+            query = self.db.query(AuditLog.entities_detected).filter(*criteria)
+            for (entity_types,) in query.execution_options(yield_per=1000):
+                for entity_type in entity_types or ():
+                    pii_types[entity_type] = pii_types.get(entity_type, 0) + 1
+            return pii_types
+
+        # A set-returning function joined in FROM sees the columns of the
+        # table before it (implicitly lateral) on both PostgreSQL and SQLite
+        entity_type = elements.table_valued("value")
+        rows = self.db.execute(
+            select(entity_type.c.value, func.count())
+            .select_from(AuditLog)
+            .join(entity_type, true())
+            .where(*criteria)
+            .group_by(entity_type.c.value)
+        )
+        return {value: count for value, count in rows}
+
     @staticmethod
-    def _hash_text(text: str) -> str:
-        """Hash text using SHA-256 for privacy protection."""
+    def _hash_text(text: Union[str, bytes]) -> str:
+        """Hash text using BLAKE3 (256-bit, 64 hex chars) for privacy protection."""
         if not text:
             return ""
-        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+        if isinstance(text, str):
+            # surrogatepass: lone surrogates are hashed rather than raising
+            text = text.encode("utf-8", "surrogatepass")
+        if len(text) >= _BLAKE3_THREADED_MIN_BYTES:
+            return blake3(text, max_threads=blake3.AUTO).hexdigest()
+        return blake3(text).hexdigest()
+
+    @classmethod
+    def matches_hash(cls, text: Union[str, bytes], digest: str) -> bool:
+        """
+        Check whether text is the one an audit log hash was computed from.
+
+        Args:
+            text: Candidate input or output text
+            digest: Stored ``input_hash``/``output_hash`` value
+
+        Returns:
+            True if the text hashes to ``digest`` under BLAKE3, or under
+            SHA-256 for rows logged before the switch
+        """
+        if cls._hash_text(text) == digest:
+            return True
+        if not text:
+            return False
+        if isinstance(text, str):
+            text = text.encode("utf-8", "surrogatepass")
+        return _sha256(text).hexdigest() == digest
 
 
 class AuditMiddleware:
@@ -293,7 +536,7 @@ class AuditMiddleware:
         session_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
     ):
-        """Log a request asynchronously."""
+        """Log a request asynchronously; returns before the write completes."""
         processing_time_ms = (time.time() - start_time) * 1000
 
         try:
@@ -312,5 +555,5 @@ class AuditMiddleware:
                 metadata=metadata,
             )
         except Exception as e:
-            logger.error(f"Audit logging failed: {e}")
+            logger.error("Audit logging failed: %s", e)
             # Don't fail the request if audit logging fails
@@ -4,30 +4,110 @@ Authentication and authorization for Anzen Gateway
 JWT tokens, API key validation, and user management.
 """
 
+import asyncio
+import base64
 import hashlib
+import hmac
 import logging
+import re
 import secrets
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple
-
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import bcrypt
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from blake3 import blake3
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, case, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
-from .database import APIKey, Organization, User, get_database_session
+from .config import get_settings
+from .database import (APIKey, DatabaseManager, Organization, User,
+                       get_async_database_session, get_database_session,
+                       get_request_database_manager)
 
 logger = logging.getLogger(__name__)
 
-# Security configuration
-SECRET_KEY = "anzen-secret-key-change-in-production"  # TODO: Use environment variable
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Security configuration (ANZEN_JWT_SECRET etc., read once at import)
+_settings = get_settings()
+SECRET_KEY = _settings.jwt_secret.get_secret_value()
+ALGORITHM = _settings.jwt_algorithm
+ACCESS_TOKEN_EXPIRE_MINUTES = _settings.access_token_expire_minutes
+_ACCESS_TOKEN_TTL = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+# Encoded once; HS256 signing then goes straight to OpenSSL's HMAC-SHA256
+_SIGNING_KEY = SECRET_KEY.encode("utf-8")
+
+# HS256 fast path: the header never changes, and copying a keyed HMAC skips
+# re-deriving the inner/outer pads; other algorithms go through jose
+_HS256_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+_HMAC_PROTOTYPE = hmac.new(_SIGNING_KEY, digestmod=hashlib.sha256)
+# Claims create_access_token issues; tokens with any others are left to jose,
+# which validates nbf/iat/aud/etc.
+_FAST_PATH_CLAIMS = frozenset({"sub", "exp"})
+
+# Decoded payloads of recently verified tokens, keyed by token digest; each
+# hit is still checked against the token's own "exp" claim
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+_token_cache_lock = threading.Lock()
+
+# Validated API keys, keyed by key hash: detached (APIKey, User, Organization)
+# snapshots, so repeat requests skip the lookup. invalidate_api_key only
+# reaches this process, so the short TTL bounds how long a key revoked in
+# another worker, or one whose user or organization was deactivated, is
+# still accepted; a hot key still costs one lookup per TTL, not per request
+_api_key_cache: TTLCache = TTLCache(maxsize=50_000, ttl=5)
+_api_key_cache_lock = threading.Lock()
+
+# Login emails with no matching user, so bursts against unknown addresses
+# (credential stuffing, enumeration) skip the DB; wrong passwords for real
+# users are never recorded here
+_auth_misses: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_auth_misses_lock = threading.Lock()
+
+# New passwords are hashed with argon2id (memory-hard, ~50 ms at the default
+# profile); bcrypt hashes still verify and are upgraded on the next login
+_password_hasher = PasswordHasher(
+    time_cost=_settings.argon2_time_cost,
+    memory_cost=_settings.argon2_memory_cost,
+    parallelism=_settings.argon2_parallelism,
+)
 security = HTTPBearer()
 
+# "ak_" + token_urlsafe(32) (43 chars), with some slack for other lengths
+_API_KEY_FORMAT = re.compile(r"ak_[A-Za-z0-9_-]{37,57}")
+
+
+def _password_bytes(password: str) -> bytes:
+    # bcrypt only uses the first 72 bytes; passlib truncated silently, while
+    # bcrypt>=4.1 raises instead
+    return password.encode("utf-8")[:72]
+
+
+def _is_argon2_hash(hashed_password: str) -> bool:
+    return hashed_password.startswith("$argon2")
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _fast_hs256_sign(signing_input: bytes) -> bytes:
+    h = _HMAC_PROTOTYPE.copy()
+    h.update(signing_input)
+    return base64.urlsafe_b64encode(h.digest()).rstrip(b"=")
+
 
 class AuthenticationError(Exception):
     """Authentication error."""
@@ -40,36 +120,110 @@ class AuthManager:
 
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verify a password against its hash."""
-        return pwd_context.verify(plain_password, hashed_password)
+        """Verify a password against its argon2id or legacy bcrypt hash."""
+        if _is_argon2_hash(hashed_password):
+            try:
+                return _password_hasher.verify(hashed_password, plain_password)
+            except (VerificationError, InvalidHashError):
+                return False
+        try:
+            return bcrypt.checkpw(
+                _password_bytes(plain_password), hashed_password.encode("utf-8")
+            )
+        except ValueError:
+            # Malformed or non-bcrypt hash
+            return False
 
     @staticmethod
     def get_password_hash(password: str) -> str:
         """Hash a password."""
-        return pwd_context.hash(password)
+        return _password_hasher.hash(password)
+
+    @staticmethod
+    def password_needs_rehash(hashed_password: str) -> bool:
+        """Whether a hash is bcrypt or uses an outdated argon2 profile."""
+        if not _is_argon2_hash(hashed_password):
+            return True
+        return _password_hasher.check_needs_rehash(hashed_password)
 
     @staticmethod
     def create_access_token(
         data: dict, expires_delta: Optional[timedelta] = None
     ) -> str:
-        """Create a JWT access token."""
-        to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.now(timezone.utc) + expires_delta
-        else:
-            expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-        to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-        return encoded_jwt
+        """Create a JWT access token (``access_token_expire_minutes`` by default)."""
+        expire = datetime.now(timezone.utc) + (expires_delta or _ACCESS_TOKEN_TTL)
+        if ALGORITHM != "HS256":
+            return jwt.encode(
+                {**data, "exp": expire}, _SIGNING_KEY, algorithm=ALGORITHM
+            )
+
+        # Same compact JSON and integer "exp" as jose
+        payload = orjson.dumps({**data, "exp": int(expire.timestamp())})
+        signing_input = (
+            _HS256_HEADER + b"." + base64.urlsafe_b64encode(payload).rstrip(b"=")
+        )
+        return (signing_input + b"." + _fast_hs256_sign(signing_input)).decode("ascii")
 
     @staticmethod
-    def verify_token(token: str) -> dict:
-        """Verify and decode a JWT token."""
+    def _fast_hs256_verify(token: str) -> Optional[dict]:
+        """
+        Verify a token as issued by ``create_access_token`` without jose.
+
+        Returns:
+            The payload, or None if the token has another header or extra
+            claims and needs jose's full validation
+
+        Raises:
+            AuthenticationError: If the signature is wrong or the token expired
+        """
+        signing_input, _, signature = token.encode("utf-8").rpartition(b".")
+        header, _, encoded_payload = signing_input.partition(b".")
+        if header != _HS256_HEADER:
+            return None
+        if not hmac.compare_digest(signature, _fast_hs256_sign(signing_input)):
+            raise AuthenticationError("Invalid token")
+
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
-        except JWTError:
+            payload = orjson.loads(_b64url_decode(encoded_payload))
+        except ValueError:
             raise AuthenticationError("Invalid token")
+        if not isinstance(payload, dict) or not _FAST_PATH_CLAIMS.issuperset(payload):
+            return None
+
+        exp = payload.get("exp")
+        if exp is not None:
+            if not isinstance(exp, int) or isinstance(exp, bool):
+                return None
+            if exp < time.time():
+                raise AuthenticationError("Invalid token")
+        return payload
+
+    @staticmethod
+    def verify_token(token: str) -> dict:
+        """Verify and decode a JWT token (valid tokens are cached until expiry)."""
+        key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+        with _token_cache_lock:
+            cached = _token_cache.get(key)
+        if cached is not None:
+            payload, expires = cached
+            if expires is None or expires > time.time():
+                return dict(payload)
+            with _token_cache_lock:
+                _token_cache.pop(key, None)
+
+        # Never cached when invalid, so a bad token is re-verified every time
+        payload = None
+        if ALGORITHM == "HS256":
+            payload = AuthManager._fast_hs256_verify(token)
+        if payload is None:
+            try:
+                payload = jwt.decode(token, _SIGNING_KEY, algorithms=[ALGORITHM])
+            except JWTError:
+                raise AuthenticationError("Invalid token")
+
+        with _token_cache_lock:
+            _token_cache[key] = (payload, payload.get("exp"))
+        return dict(payload)
 
     @staticmethod
     def generate_api_key() -> Tuple[str, str, str]:
@@ -83,7 +237,7 @@ class AuthManager:
         key = f"ak_{secrets.token_urlsafe(32)}"
 
         # Create hash for storage
-        key_hash = hashlib.sha256(key.encode()).hexdigest()
+        key_hash = AuthManager.hash_api_key(key)
 
         # Create prefix for display
         key_prefix = key[:12] + "..."
@@ -93,41 +247,218 @@ class AuthManager:
     @staticmethod
     def hash_api_key(api_key: str) -> str:
         """Hash an API key for storage."""
+        # Keys are 256-bit random tokens, so a fast hash is as safe as SHA-256
+        return blake3(api_key.encode()).hexdigest()
+
+    @staticmethod
+    def legacy_hash_api_key(api_key: str) -> str:
+        """Hash an API key the way keys created before BLAKE3 were stored."""
         return hashlib.sha256(api_key.encode()).hexdigest()
 
 
+class APIKeyUsageTracker:
+    """Accumulates API key usage and writes it in periodic bulk UPDATEs."""
+
+    def __init__(self, flush_interval: float = 5.0):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # api_key_id -> (uses since last flush, last use)
+        self._pending: Dict[str, Tuple[int, datetime]] = {}
+        self._bind = None
+
+    def record(self, api_key_id: str, bind):
+        """Count one use of an API key (written by the next flush)."""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            count, _ = self._pending.get(api_key_id, (0, now))
+            self._pending[api_key_id] = (count + 1, now)
+            self._bind = bind
+
+    async def run(self):
+        """Flush every ``flush_interval`` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await run_in_threadpool(self.flush)
+
+    def flush(self):
+        """Write all pending usage counts in one transaction."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            bind = self._bind
+        if not pending:
+            return
+
+        # Other workers flush too, so last_used only ever moves forward
+        table = APIKey.__table__
+        last_used = bindparam("b_last_used")
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                usage_count=table.c.usage_count + bindparam("b_count"),
+                last_used=case(
+                    (table.c.last_used > last_used, table.c.last_used),
+                    else_=last_used,
+                ),
+            )
+        )
+        rows = [
+            {"b_id": key_id, "b_count": count, "b_last_used": last_used}
+            for key_id, (count, last_used) in pending.items()
+        ]
+        try:
+            with Session(bind) as session:
+                session.execute(stmt, rows)
+                session.commit()
+        except Exception as e:
+            logger.error("Failed to update usage for %d API keys: %s", len(rows), e)
+
+
+@lru_cache(maxsize=1)
+def get_api_key_usage_tracker() -> APIKeyUsageTracker:
+    """Get the process-wide API key usage tracker."""
+    return APIKeyUsageTracker()
+
+
+async def _rehash_api_key(db: AsyncSession, api_key_id: str, key_hash: str):
+    """Replace a legacy SHA-256 key hash with its BLAKE3 hash."""
+    try:
+        await db.execute(
+            update(APIKey).where(APIKey.id == api_key_id).values(key_hash=key_hash)
+        )
+        await db.commit()
+        logger.info("Migrated API key %s to BLAKE3 hash", api_key_id)
+    except Exception as e:
+        logger.error("Failed to migrate API key %s hash: %s", api_key_id, e)
+
+
+def upgrade_password_hash(user_id: str, password: str, bind):
+    """
+    Rehash a user's password under the current argon2id profile and store it.
+
+    Slow (one full argon2id hash), so logins schedule it to run after the
+    response; it uses a short session of its own.
+    """
+    try:
+        hashed_password = AuthManager.get_password_hash(password)
+        with Session(bind) as session:
+            session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(hashed_password=hashed_password)
+            )
+            session.commit()
+        logger.info("Upgraded password hash for user %s", user_id)
+    except Exception as e:
+        logger.error("Failed to upgrade password hash for user %s: %s", user_id, e)
+
+
+def invalidate_api_key(key_hash: str):
+    """Drop a revoked API key from this process's validation cache."""
+    with _api_key_cache_lock:
+        _api_key_cache.pop(key_hash, None)
+
+
+async def warm_api_key_cache(db_manager: DatabaseManager, limit: int = 5000) -> int:
+    """
+    Preload the most recently used API keys into the validation cache.
+
+    Run at startup so a restarted instance doesn't send every client's first
+    request to the database at once.
+
+    Args:
+        db_manager: Database to read the keys from
+        limit: Maximum number of keys to load
+
+    Returns:
+        Number of keys cached
+    """
+    try:
+        async with db_manager.async_session_factory() as db:
+            result = await db.execute(
+                select(APIKey)
+                .options(joinedload(APIKey.user), joinedload(APIKey.organization))
+                .where(APIKey.is_active == True, APIKey.last_used.isnot(None))
+                .order_by(APIKey.last_used.desc())
+                .limit(limit)
+            )
+            records = result.scalars().all()
+            entries = {}
+            for record in records:
+                user, organization = record.user, record.organization
+                if not user.is_active or not organization.is_active:
+                    continue
+                # Legacy SHA-256 rows land under a key nothing looks up and
+                # simply age out; they are rehashed on their next use
+                entries[record.key_hash] = (record, user, organization)
+            # Users and organizations are shared between keys; detach them all
+            db.expunge_all()
+    except Exception as e:
+        logger.warning("Failed to warm API key cache: %s", e)
+        return 0
+
+    with _api_key_cache_lock:
+        _api_key_cache.update(entries)
+    logger.info("Warmed API key cache with %d keys", len(entries))
+    return len(entries)
+
+
 def authenticate_user(email: str, password: str, db: Session) -> Optional[User]:
-    """Authenticate a user with email and password."""
-    user = db.query(User).filter(User.email == email).first()
+    """
+    Authenticate a user with email and password.
+
+    Legacy or outdated hashes are not upgraded here; callers check
+    ``AuthManager.password_needs_rehash`` and run ``upgrade_password_hash``
+    off the request path.
+    """
+    with _auth_misses_lock:
+        if email in _auth_misses:
+            return None
+
+    # The login response needs the full user and its organization
+    user = db.execute(
+        select(User).options(joinedload(User.organization)).where(User.email == email)
+    ).scalar_one_or_none()
     if not user:
+        with _auth_misses_lock:
+            _auth_misses[email] = True
         return None
     if not AuthManager.verify_password(password, user.hashed_password):
         return None
     return user
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_database_session),
-) -> User:
-    """Get current user from JWT token."""
-    credentials_exception = HTTPException(
+def _invalid_credentials() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _token_user_query(credentials: HTTPAuthorizationCredentials):
+    """Build the user lookup for a JWT, raising 401 if the token is invalid."""
     try:
         payload = AuthManager.verify_token(credentials.credentials)
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except AuthenticationError:
-        raise credentials_exception
+        raise _invalid_credentials()
+    user_id: str = payload.get("sub")
+    if user_id is None:
+        raise _invalid_credentials()
+
+    # Organization is read by most admin routes; load it in the same query
+    return select(User).options(joinedload(User.organization)).where(User.id == user_id)
+
 
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_database_session),
+) -> User:
+    """Get current user from JWT token."""
+    result = await db.execute(_token_user_query(credentials))
+    user = result.scalar_one_or_none()
     if user is None:
-        raise credentials_exception
+        raise _invalid_credentials()
 
     return user
 
@@ -139,9 +470,30 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
-def validate_api_key(
+@dataclass
+class AuthCtx:
+    """Authenticated user and the request's database session."""
+
+    user: User
+    db: Session
+
+
+def auth_ctx(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_database_session),
+) -> AuthCtx:
+    """Resolve the active user and session as one flat dependency."""
+    # The route's own session serves the lookup, so a request holds one
+    # pooled connection; being sync, this runs in the threadpool
+    user = db.execute(_token_user_query(credentials)).scalar_one_or_none()
+    if user is None:
+        raise _invalid_credentials()
+    return AuthCtx(user=get_current_active_user(user), db=db)
+
+
+async def validate_api_key(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db_manager: DatabaseManager = Depends(get_request_database_manager),
 ) -> Tuple[APIKey, User, Organization]:
     """
     Validate API key and return associated key, user, and organization.
@@ -157,46 +509,77 @@ def validate_api_key(
 
     # Extract API key from Authorization header
     api_key = credentials.credentials
-    if not api_key.startswith("ak_"):
+    # Malformed tokens are rejected before any hashing or database work
+    if not _API_KEY_FORMAT.fullmatch(api_key):
         raise credentials_exception
 
     # Hash the provided key
     key_hash = AuthManager.hash_api_key(api_key)
 
-    # Look up the API key
-    api_key_record = (
-        db.query(APIKey)
-        .filter(APIKey.key_hash == key_hash, APIKey.is_active == True)
-        .first()
-    )
-
-    if not api_key_record:
-        raise credentials_exception
-
-    # Check if key is expired
-    if api_key_record.expires_at and api_key_record.expires_at < datetime.now(
-        timezone.utc
-    ):
+    with _api_key_cache_lock:
+        cached = _api_key_cache.get(key_hash)
+
+    if cached is None:
+        # Cache misses only: a session is opened just for the lookup
+        async with db_manager.async_session_factory() as db:
+            # Look up the API key with its user and organization in one query;
+            # keys stored before the switch to BLAKE3 still match on SHA-256
+            legacy_hash = AuthManager.legacy_hash_api_key(api_key)
+            result = await db.execute(
+                select(APIKey)
+                .options(joinedload(APIKey.user), joinedload(APIKey.organization))
+                .where(
+                    APIKey.key_hash.in_((key_hash, legacy_hash)),
+                    APIKey.is_active == True,
+                )
+            )
+            api_key_record = result.scalars().first()
+
+            if not api_key_record:
+                raise credentials_exception
+
+            # Constant-time recheck of the stored hash
+            is_current = secrets.compare_digest(api_key_record.key_hash, key_hash)
+            if not is_current and not secrets.compare_digest(
+                api_key_record.key_hash, legacy_hash
+            ):
+                raise credentials_exception
+
+            user = api_key_record.user
+            organization = api_key_record.organization
+
+            if not user.is_active or not organization.is_active:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="User or organization inactive",
+                )
+
+            # Fully loaded, so the snapshots stay readable outside the session
+            for obj in (api_key_record, user, organization):
+                db.expunge(obj)
+
+            if not is_current:
+                await _rehash_api_key(db, api_key_record.id, key_hash)
+                api_key_record.key_hash = key_hash
+        cached = (api_key_record, user, organization)
+        with _api_key_cache_lock:
+            _api_key_cache[key_hash] = cached
+
+    api_key_record, user, organization = cached
+
+    # Check if key is expired; SQLite hands back the stored UTC time naive
+    expires_at = api_key_record.expires_at
+    if expires_at is not None and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at and expires_at < datetime.now(timezone.utc):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="API key expired"
         )
 
-    # Update last used timestamp and usage count
-    api_key_record.last_used = datetime.now(timezone.utc)
-    api_key_record.usage_count += 1
-    db.commit()
-
-    # Get associated user and organization
-    user = api_key_record.user
-    organization = api_key_record.organization
-
-    if not user.is_active or not organization.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User or organization inactive",
-        )
+    # Last used timestamp and usage count are written in the background
+    get_api_key_usage_tracker().record(api_key_record.id, db_manager.engine)
 
-    return api_key_record, user, organization
+    return cached
 
 
 def create_user(
@@ -206,15 +589,25 @@ def create_user(
     organization_id: str,
     db: Session,
     is_admin: bool = False,
+    commit: bool = True,
+    hashed_password: Optional[str] = None,
 ) -> User:
-    """Create a new user."""
+    """
+    Create a new user (only flushed when ``commit`` is False).
+
+    ``hashed_password`` may be passed when the argon2id hash was computed
+    ahead of time; ``password`` is then not hashed again.
+    """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == email).first()
+    existing_user = db.execute(
+        select(User.id).where(User.email == email)
+    ).scalar_one_or_none()
     if existing_user:
         raise ValueError("User with this email already exists")
 
     # Create user
-    hashed_password = AuthManager.get_password_hash(password)
+    if hashed_password is None:
+        hashed_password = AuthManager.get_password_hash(password)
     user = User(
         email=email,
         name=name,
@@ -224,10 +617,17 @@ def create_user(
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    if commit:
+        db.commit()
+        db.refresh(user)
+    else:
+        db.flush()
 
-    logger.info(f"Created user: {email}")
+    # A failed login just before sign-up must not lock the new user out
+    with _auth_misses_lock:
+        _auth_misses.pop(email, None)
+
+    logger.info("Created user: %s", email)
     return user
 
 
@@ -237,10 +637,14 @@ def create_api_key(
     organization_id: str,
     db: Session,
     expires_days: Optional[int] = None,
+    commit: bool = True,
 ) -> Tuple[str, APIKey]:
     """
     Create a new API key for a user.
 
+    With ``commit=False`` the record is only flushed, leaving the transaction
+    to the caller.
+
     Returns:
         Tuple of (full_api_key, api_key_record)
     """
@@ -263,8 +667,11 @@ def create_api_key(
     )
 
     db.add(api_key)
-    db.commit()
-    db.refresh(api_key)
+    if commit:
+        db.commit()
+        db.refresh(api_key)
+    else:
+        db.flush()
 
-    logger.info(f"Created API key: {name} for user {user_id}")
+    logger.info("Created API key: %s for user %s", name, user_id)
     return full_key, api_key
@@ -5,8 +5,10 @@ Settings and configuration management.
 """
 
 import os
+from functools import lru_cache
 from typing import List
 
+from pydantic import SecretStr
 from pydantic_settings import BaseSettings
 
 
@@ -17,6 +19,7 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8000
     debug: bool = False
+    workers: int = 1  # server processes; set by the CLI for its children
 
     # NeMo Guardrails config
     config_path: str = "./config"
@@ -27,6 +30,16 @@ class Settings(BaseSettings):
     # Database settings
     database_url: str = "sqlite:///./anzen.db"
 
+    # JWT access tokens
+    jwt_secret: SecretStr = SecretStr("anzen-secret-key-change-in-production")
+    jwt_algorithm: str = "HS256"
+    access_token_expire_minutes: int = 30
+
+    # Password hashing (argon2id profile)
+    argon2_time_cost: int = 2
+    argon2_memory_cost: int = 65536  # KiB
+    argon2_parallelism: int = 1
+
     # Redis settings
     redis_url: str = "redis://localhost:6379"
 
@@ -38,6 +51,7 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings."""
+    """Get application settings (parsed once; ``cache_clear`` to re-read env)."""
     return Settings()
@@ -4,12 +4,17 @@ Database models and connection for Anzen Gateway
 SQLAlchemy models for users, audit logs, API keys, and policies.
 """
 
+import threading
 import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
 
+from fastapi import Depends, Request
 from sqlalchemy import (JSON, Boolean, Column, DateTime, Float, ForeignKey,
-                        Integer, String, Text, create_engine)
+                        Index, Integer, String, Text, create_engine, event,
+                        make_url)
+from sqlalchemy.ext.asyncio import (AsyncEngine, AsyncSession,
+                                    async_sessionmaker, create_async_engine)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session, relationship, sessionmaker
 
@@ -53,6 +58,7 @@ class User(Base):
     """User model."""
 
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_org_active", "organization_id", "is_active"),)
 
     id = Column(UUID_TYPE, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String(255), unique=True, nullable=False)
@@ -84,6 +90,7 @@ class APIKey(Base):
     """API key model for authentication."""
 
     __tablename__ = "api_keys"
+    __table_args__ = (Index("ix_api_keys_org_active", "organization_id", "is_active"),)
 
     id = Column(UUID_TYPE, primary_key=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(255), nullable=False)
@@ -91,7 +98,7 @@ class APIKey(Base):
     key_prefix = Column(String(20), nullable=False)  # First few chars for display
 
     # Relationships
-    user_id = Column(UUID_TYPE, ForeignKey("users.id"), nullable=False)
+    user_id = Column(UUID_TYPE, ForeignKey("users.id"), nullable=False, index=True)
     user = relationship("User", back_populates="api_keys")
     organization_id = Column(UUID_TYPE, ForeignKey("organizations.id"), nullable=False)
     organization = relationship("Organization", back_populates="api_keys")
@@ -113,6 +120,16 @@ class AuditLog(Base):
     """Audit log model for compliance tracking."""
 
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_org_created", "organization_id", "created_at"),
+        # text_pattern_ops lets PostgreSQL serve "public:%" prefix LIKEs
+        # from the index under any collation
+        Index(
+            "ix_audit_logs_route_prefix",
+            "route",
+            postgresql_ops={"route": "text_pattern_ops"},
+        ),
+    )
 
     id = Column(UUID_TYPE, primary_key=True, default=lambda: str(uuid.uuid4()))
 
@@ -138,8 +155,8 @@ class AuditLog(Base):
     policy_applied = Column(String(100), nullable=True)
 
     # Text analysis (hashed for privacy)
-    input_hash = Column(String(64), nullable=True)  # SHA-256 hash of input
-    output_hash = Column(String(64), nullable=True)  # SHA-256 hash of output
+    input_hash = Column(String(64), nullable=True)  # BLAKE3 hash of input
+    output_hash = Column(String(64), nullable=True)  # BLAKE3 hash of output
     text_length = Column(Integer, nullable=False)
 
     # Timing and performance
@@ -180,16 +197,84 @@ class PolicyTemplate(Base):
     )
 
 
+# Async drivers for the (sync) database URLs used in configuration
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def get_async_url(database_url: str) -> str:
+    """Map a sync database URL onto its async driver."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver:
+        url = url.set(drivername=driver)
+    return url.render_as_string(hide_password=False)
+
+
+# Applied to every new SQLite connection: WAL lets readers run alongside the
+# writer, and NORMAL sync is durable under WAL without an fsync per commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _engine_options(database_url: str) -> dict:
+    """Pool and statement-cache settings shared by the sync and async engines."""
+    options = {"echo": False, "pool_pre_ping": True, "query_cache_size": 1200}
+    if make_url(database_url).get_backend_name() != "sqlite":
+        options.update(
+            pool_size=20, max_overflow=40, pool_timeout=30, pool_recycle=1800
+        )
+    return options
+
+
 class DatabaseManager:
     """Database connection and session management."""
 
     def __init__(self, database_url: str):
         self.database_url = database_url
-        self.engine = create_engine(database_url, echo=False)
+        self.is_sqlite = make_url(database_url).get_backend_name() == "sqlite"
+
+        options = _engine_options(database_url)
+        if self.is_sqlite:
+            # Sessions may be handed between FastAPI's threadpool and the loop
+            options["connect_args"] = {"check_same_thread": False}
+        self.engine = create_engine(database_url, **options)
+        if self.is_sqlite:
+            event.listen(self.engine, "connect", _set_sqlite_pragmas)
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
 
+        # Async engine for non-blocking writes, created on first use
+        self.async_engine: Optional[AsyncEngine] = None
+        self._async_sessionmaker: Optional[async_sessionmaker] = None
+
+    @property
+    def async_session_factory(self) -> async_sessionmaker:
+        """Session factory bound to the pooled async engine."""
+        if self._async_sessionmaker is None:
+            self.async_engine = create_async_engine(
+                get_async_url(self.database_url), **_engine_options(self.database_url)
+            )
+            if self.is_sqlite:
+                event.listen(
+                    self.async_engine.sync_engine, "connect", _set_sqlite_pragmas
+                )
+            self._async_sessionmaker = async_sessionmaker(
+                self.async_engine, expire_on_commit=False
+            )
+        return self._async_sessionmaker
+
     def create_tables(self):
         """Create all database tables."""
         Base.metadata.create_all(bind=self.engine)
@@ -203,20 +288,56 @@ class DatabaseManager:
         """Close database connections."""
         self.engine.dispose()
 
+    async def close_async(self):
+        """Close database connections, including the async pool."""
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        self.close()
 
-# Dependency for FastAPI
-def get_database_session():
-    """FastAPI dependency to get database session."""
-    from .config import get_settings
 
-    settings = get_settings()
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
+
+
+def get_database_manager() -> DatabaseManager:
+    """Get the process-wide database manager (tables created on first use)."""
+    global _db_manager
+    if _db_manager is None:
+        from .config import get_settings
+
+        # Locked so concurrent first callers don't both run create_tables
+        with _db_manager_lock:
+            if _db_manager is None:
+                manager = DatabaseManager(get_settings().database_url)
+                manager.create_tables()
+                _db_manager = manager
+    return _db_manager
+
 
-    # Create database manager if not exists
-    if not hasattr(get_database_session, "_db_manager"):
-        get_database_session._db_manager = DatabaseManager(settings.database_url)
-        get_database_session._db_manager.create_tables()
+# Dependencies for FastAPI
+def get_request_database_manager(request: Request) -> DatabaseManager:
+    """FastAPI dependency to get the app's database manager."""
+    # Set up by create_app; apps that mount the routers themselves fall back
+    # to the process-wide manager
+    db_manager = getattr(request.app.state, "db_manager", None)
+    if db_manager is None:
+        db_manager = get_database_manager()
+    return db_manager
 
-    session = get_database_session._db_manager.get_session()
+
+async def get_async_database_session(
+    db_manager: DatabaseManager = Depends(get_request_database_manager),
+) -> AsyncSession:
+    """FastAPI dependency to get an async database session."""
+    async with db_manager.async_session_factory() as session:
+        yield session
+
+
+def get_database_session(
+    db_manager: DatabaseManager = Depends(get_request_database_manager),
+):
+    """FastAPI dependency to get database session."""
+    session = db_manager.get_session()
     try:
         yield session
     finally:
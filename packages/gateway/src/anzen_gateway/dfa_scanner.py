@@ -0,0 +1,147 @@
+"""
+Multi-pattern prefilter for PII detection
+
+Finds which entity patterns can match a text in one pass, so the exact
+per-pattern regex scans only run for the types that are actually present.
+"""
+
+import logging
+import re
+from typing import Dict, List, Pattern
+
+# Try to import Hyperscan, then RE2; fall back to character triggers if
+# neither is available
+try:
+    import hyperscan
+
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+try:
+    import re2
+
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Fallback: characters without which a pattern cannot match at all
+_DIGIT = re.compile(r"\d")
+TRIGGERS: Dict[str, Pattern] = {
+    "EMAIL_ADDRESS": re.compile("@"),
+    "PHONE_NUMBER": _DIGIT,
+    "US_SSN": _DIGIT,
+    "CREDIT_CARD": _DIGIT,
+    "IBAN_CODE": _DIGIT,
+    "US_PASSPORT": _DIGIT,
+    "IP_ADDRESS": _DIGIT,
+}
+
+
+def _re2_pattern(pattern: str) -> str:
+    r"""
+    Translate a ``re`` pattern so RE2 matches at least what ``re`` does on
+    ASCII text: RE2's ``\s`` lacks the ``\v`` and ``\x1c``-``\x1f``
+    separators that ``re`` counts as whitespace.
+    """
+    out = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            escape = pattern[i : i + 2]
+            if escape == r"\s":
+                extra = r"\s\x0b\x1c-\x1f"
+                escape = extra if in_class else f"[{extra}]"
+            out.append(escape)
+            i += 2
+            continue
+        if ch == "[":
+            in_class = True
+        elif ch == "]":
+            in_class = False
+        out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+class DFAScanner:
+    """One-pass candidate filter over a set of entity regexes."""
+
+    def __init__(self, patterns: Dict[str, Pattern]):
+        self.entity_types: List[str] = list(patterns)
+        self._database = None
+        self._re2_set = None
+
+        if HYPERSCAN_AVAILABLE:
+            try:
+                # SINGLEMATCH: one report per pattern is all a prefilter needs;
+                # UCP only for patterns that use Unicode \b/\d/\w semantics
+                flags = hyperscan.HS_FLAG_SINGLEMATCH | hyperscan.HS_FLAG_UTF8
+                database = hyperscan.Database()
+                database.compile(
+                    expressions=[p.pattern.encode("utf-8") for p in patterns.values()],
+                    ids=list(range(len(patterns))),
+                    elements=len(patterns),
+                    flags=[
+                        flags if p.flags & re.ASCII else flags | hyperscan.HS_FLAG_UCP
+                        for p in patterns.values()
+                    ],
+                )
+                self._database = database
+                logger.info("Compiled %d PII patterns into one DFA", len(patterns))
+            except Exception as e:
+                logger.warning("Hyperscan compile failed: %s", e)
+
+        if self._database is None and RE2_AVAILABLE:
+            try:
+                re2_set = re2.Set.SearchSet()
+                for pattern in patterns.values():
+                    re2_set.Add(_re2_pattern(pattern.pattern))
+                re2_set.Compile()
+                self._re2_set = re2_set
+                logger.info("Compiled %d PII patterns into an RE2 set", len(patterns))
+            except Exception as e:
+                logger.warning("RE2 set compile failed, using triggers: %s", e)
+
+    def candidates(self, text: str) -> List[str]:
+        """
+        Get the entity types whose pattern may match ``text``.
+
+        Never misses a type the exact regex would find; may include types
+        that then turn out not to match.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Entity types in pattern order
+        """
+        if self._database is not None:
+            found = set()
+
+            def on_match(pattern_id, start, end, flags, context):
+                found.add(pattern_id)
+
+            self._database.scan(text.encode("utf-8"), match_event_handler=on_match)
+            return [t for i, t in enumerate(self.entity_types) if i in found]
+
+        # RE2's \b and \d are ASCII-only, so Unicode text uses the triggers
+        if self._re2_set is not None and text.isascii():
+            found = set(self._re2_set.Match(text) or ())
+            return [t for i, t in enumerate(self.entity_types) if i in found]
+
+        hits: Dict[Pattern, bool] = {}
+        result = []
+        for entity_type in self.entity_types:
+            trigger = TRIGGERS.get(entity_type)
+            if trigger is not None:
+                if trigger not in hits:
+                    hits[trigger] = trigger.search(text) is not None
+                if not hits[trigger]:
+                    continue
+            result.append(entity_type)
+        return result
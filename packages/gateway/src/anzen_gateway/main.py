@@ -6,17 +6,37 @@ for PII detection and masking in AI agent workflows.
 """
 
 import argparse
+import asyncio
 import logging
+import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .api import AnzenGateway
+from .audit import get_audit_writer
+from .auth import get_api_key_usage_tracker, warm_api_key_cache
 # from .admin_api import AdminAPI  # Temporarily disabled due to dependencies
 from .config import get_settings
+from .database import get_database_manager
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the API key cache and flush usage in the background; drain both on exit."""
+    await warm_api_key_cache(app.state.db_manager)
+    usage_tracker = get_api_key_usage_tracker()
+    usage_flusher = asyncio.create_task(usage_tracker.run())
+    yield
+    usage_flusher.cancel()
+    await get_audit_writer().close()
+    usage_tracker.flush()
+    app.state.gateway.close()
 
 
 def create_app() -> FastAPI:
@@ -29,6 +49,8 @@ def create_app() -> FastAPI:
         version="0.1.0",
         docs_url="/docs" if settings.debug else None,
         redoc_url="/redoc" if settings.debug else None,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     # Add CORS middleware
@@ -40,8 +62,16 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Initialize the safety gateway
-    gateway = AnzenGateway(config_path=settings.config_path)
+    # Connect and create tables once at startup, not on the first request
+    app.state.db_manager = get_database_manager()
+
+    # Initialize the safety gateway, splitting the CPUs between the PII
+    # worker pools of all server processes
+    gateway = AnzenGateway(
+        config_path=settings.config_path,
+        cpu_workers=(os.cpu_count() or 1) // settings.workers,
+    )
+    app.state.gateway = gateway
 
     # Initialize the admin API (temporarily disabled)
     # admin_api = AdminAPI()
@@ -65,6 +95,12 @@ def main():
     parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
     parser.add_argument("--config", help="Path to NeMo Guardrails config directory")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (ignored with --reload)",
+    )
     parser.add_argument("--log-level", default="info", help="Log level")
 
     args = parser.parse_args()
@@ -75,21 +111,26 @@ def main():
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
 
-    # Set config path if provided
+    # Settings for the server processes are passed through the environment
+    os.environ["ANZEN_WORKERS"] = "1" if args.reload else str(args.workers)
     if args.config:
-        import os
-
         os.environ["ANZEN_CONFIG_PATH"] = args.config
+    get_settings.cache_clear()
 
-    # Create the app
-    app = create_app()
+    # uvloop (libuv event loop) is not available on Windows
+    loop = "uvloop" if sys.platform != "win32" else "auto"
 
-    # Run the server
+    # Run the server; reload and multiple workers need an import string, so
+    # each process builds its own app through the factory
     uvicorn.run(
-        app,
+        "anzen_gateway.main:create_app",
+        factory=True,
         host=args.host,
         port=args.port,
         reload=args.reload,
+        workers=None if args.reload else args.workers,
+        loop=loop,
+        http="httptools",
         log_level=args.log_level,
     )
 
@@ -6,7 +6,7 @@ Pydantic models for API requests and responses.
 
 from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class EntityInfo(BaseModel):
@@ -40,6 +40,18 @@ class SafetyCheckResponse(BaseModel):
     metadata: dict = {}
 
 
+class SafetyCheckBatchRequest(BaseModel):
+    """Request model for a batch of safety checks."""
+
+    items: List[SafetyCheckRequest] = Field(..., min_length=1, max_length=100)
+
+
+class SafetyCheckBatchResponse(BaseModel):
+    """Response model for a batch of safety checks, in request order."""
+
+    results: List[SafetyCheckResponse]
+
+
 class PolicyDecision(BaseModel):
     """Policy decision details."""
 
@@ -6,6 +6,7 @@ Integrates Microsoft Presidio for detecting and masking PII in text.
 
 import logging
 import re
+from functools import lru_cache
 from typing import Any, Dict, List
 
 # Try to import Presidio, fall back to pattern-based detection if not available
@@ -51,8 +52,58 @@ except ImportError:
             pass
 
 
+from .dfa_scanner import DFAScanner
+
 logger = logging.getLogger(__name__)
 
+# PII patterns, compiled once at import. All but PERSON only match ASCII
+# text, so they use ASCII \b/\d semantics, which SRE checks faster; PERSON
+# keeps Unicode word boundaries so accented names aren't cut short
+PII_PATTERNS = {
+    "EMAIL_ADDRESS": re.compile(
+        r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b", re.ASCII
+    ),
+    "PHONE_NUMBER": re.compile(
+        r"(\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})", re.ASCII
+    ),
+    "US_SSN": re.compile(r"\b\d{3}-?\d{2}-?\d{4}\b", re.ASCII),
+    "CREDIT_CARD": re.compile(r"\b(?:\d{4}[-\s]?){3}\d{4}\b", re.ASCII),
+    "IBAN_CODE": re.compile(
+        r"\b[A-Z]{2}\d{2}[A-Z0-9]{4}\d{7}([A-Z0-9]?){0,16}\b", re.ASCII
+    ),
+    "US_PASSPORT": re.compile(r"\b[A-Z]\d{8}\b", re.ASCII),
+    "IP_ADDRESS": re.compile(r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b", re.ASCII),
+    "PERSON": re.compile(r"\b[A-Z][a-z]+ [A-Z][a-z]+\b"),
+}
+
+# Masked replacement for each entity type, given the matched text
+MASKS = {
+    "EMAIL_ADDRESS": lambda text: f"***@{text.split('@')[1]}",
+    "PHONE_NUMBER": lambda text: "***-***-" + text[-4:],
+    "CREDIT_CARD": lambda text: "****-****-****-" + text[-4:],
+    "US_SSN": lambda text: "***-**-" + text[-4:],
+    "IBAN_CODE": lambda text: text[:4] + "****" + text[-4:],
+    "US_PASSPORT": lambda text: "[PASSPORT]",
+    "IP_ADDRESS": lambda text: "***.***.***." + text.split(".")[-1],
+    "PERSON": lambda text: "[PERSON]",
+}
+
+# Confidence score reported for each entity type
+ENTITY_SCORES = {
+    "CREDIT_CARD": 0.95,
+    "US_SSN": 0.95,
+    "US_PASSPORT": 0.90,
+    "IBAN_CODE": 0.85,
+    "EMAIL_ADDRESS": 0.80,
+    "PHONE_NUMBER": 0.75,
+    "IP_ADDRESS": 0.70,
+    "PERSON": 0.60,
+}
+
+# Entity types driving risk levels
+HIGH_RISK = frozenset({"CREDIT_CARD", "US_SSN", "US_PASSPORT", "IBAN_CODE"})
+MEDIUM_RISK = frozenset({"EMAIL_ADDRESS", "PHONE_NUMBER", "PERSON"})
+
 
 class SimpleNlpEngine(NlpEngine):
     """Simple NLP engine that doesn't require spaCy models."""
@@ -144,23 +195,8 @@ class PresidioActuator:
         self.analyzer = None
         self.anonymizer = None
 
-        # Define PII patterns for detection
-        self.patterns = {
-            "EMAIL_ADDRESS": re.compile(
-                r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b"
-            ),
-            "PHONE_NUMBER": re.compile(
-                r"(\+?1[-.\s]?)?\(?([0-9]{3})\)?[-.\s]?([0-9]{3})[-.\s]?([0-9]{4})"
-            ),
-            "US_SSN": re.compile(r"\b\d{3}-?\d{2}-?\d{4}\b"),
-            "CREDIT_CARD": re.compile(r"\b(?:\d{4}[-\s]?){3}\d{4}\b"),
-            "IBAN_CODE": re.compile(
-                r"\b[A-Z]{2}\d{2}[A-Z0-9]{4}\d{7}([A-Z0-9]?){0,16}\b"
-            ),
-            "US_PASSPORT": re.compile(r"\b[A-Z]\d{8}\b"),
-            "IP_ADDRESS": re.compile(r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b"),
-            "PERSON": re.compile(r"\b[A-Z][a-z]+ [A-Z][a-z]+\b"),
-        }
+        self.patterns = PII_PATTERNS
+        self.scanner = DFAScanner(self.patterns)
 
     def detect_pii(self, text: str, language: str = "en") -> List[Dict[str, Any]]:
         """
@@ -175,35 +211,34 @@ class PresidioActuator:
         """
         # Use pattern-based detection
         entities = []
-        risk_levels = {
-            "CREDIT_CARD": 0.95,
-            "US_SSN": 0.95,
-            "US_PASSPORT": 0.90,
-            "IBAN_CODE": 0.85,
-            "EMAIL_ADDRESS": 0.80,
-            "PHONE_NUMBER": 0.75,
-            "IP_ADDRESS": 0.70,
-            "PERSON": 0.60,
-        }
-
-        for entity_type, pattern in self.patterns.items():
-            for match in pattern.finditer(text):
-                entity = {
-                    "type": entity_type,
-                    "start": match.start(),
-                    "end": match.end(),
-                    "score": risk_levels.get(entity_type, 0.5),
-                    "text": match.group(),
-                }
-                entities.append(entity)
-
-        logger.info(f"Detected {len(entities)} PII entities using pattern matching")
+        append = entities.append
+
+        # Exact scans only for the types the one-pass prefilter found; each
+        # type keeps its own finditer so matches may overlap across types
+        for entity_type in self.scanner.candidates(text):
+            score = ENTITY_SCORES.get(entity_type, 0.5)
+            for match in self.patterns[entity_type].finditer(text):
+                start, end = match.span()
+                append(
+                    {
+                        "type": entity_type,
+                        "start": start,
+                        "end": end,
+                        "score": score,
+                        "text": text[start:end],
+                    }
+                )
+
+        logger.debug("Detected %d PII entities using pattern matching", len(entities))
         return entities
 
     def anonymize_text(self, text: str, entities: List[Dict[str, Any]] = None) -> str:
         """
         Anonymize PII in text.
 
+        Only a replacement pass is made when ``entities`` is given; the text
+        is scanned again only if it is omitted.
+
         Args:
             text: Input text to anonymize
             entities: Pre-detected entities (optional, will detect if not provided)
@@ -215,78 +250,60 @@ class PresidioActuator:
         if entities is None:
             entities = self.detect_pii(text)
 
-        # Use pattern-based anonymization
-        # Sort entities by start position in reverse order to avoid index shifting
-        entities_sorted = sorted(entities, key=lambda x: x["start"], reverse=True)
+        # Use pattern-based anonymization: copy the text between entities
+        # and join once, instead of re-slicing the whole string per entity.
+        # Longer matches sort first; an overlapping entity is dropped, unless
+        # it extends further, in which case its mask follows so nothing leaks
+        entities_sorted = sorted(entities, key=lambda x: (x["start"], -x["end"]))
 
-        anonymized_text = text
+        parts = []
+        cursor = 0
         for entity in entities_sorted:
-            entity_type = entity["type"]
-            start = entity["start"]
-            end = entity["end"]
-
-            # Define replacement patterns
-            if entity_type == "EMAIL_ADDRESS":
-                replacement = f"***@{entity['text'].split('@')[1]}"
-            elif entity_type == "PHONE_NUMBER":
-                replacement = "***-***-" + entity["text"][-4:]
-            elif entity_type == "CREDIT_CARD":
-                replacement = "****-****-****-" + entity["text"][-4:]
-            elif entity_type == "US_SSN":
-                replacement = "***-**-" + entity["text"][-4:]
-            elif entity_type == "IBAN_CODE":
-                replacement = entity["text"][:4] + "****" + entity["text"][-4:]
-            elif entity_type == "US_PASSPORT":
-                replacement = "[PASSPORT]"
-            elif entity_type == "IP_ADDRESS":
-                replacement = "***.***.***." + entity["text"].split(".")[-1]
-            elif entity_type == "PERSON":
-                replacement = "[PERSON]"
-            else:
-                replacement = "[REDACTED]"
-
-            # Replace the entity in the text
-            anonymized_text = (
-                anonymized_text[:start] + replacement + anonymized_text[end:]
-            )
-
-        logger.info(
-            f"Anonymized text: {len(entities_sorted)} entities masked using pattern matching"
+            if entity["end"] <= cursor:
+                continue
+            parts.append(text[cursor : entity["start"]])
+            mask = MASKS.get(entity["type"])
+            parts.append(mask(entity["text"]) if mask else "[REDACTED]")
+            cursor = entity["end"]
+        parts.append(text[cursor:])
+        anonymized_text = "".join(parts)
+
+        logger.debug(
+            "Anonymized text: %d entities masked using pattern matching",
+            len(entities_sorted),
         )
         return anonymized_text
 
 
+@lru_cache(maxsize=1)
+def get_presidio_actuator() -> PresidioActuator:
+    """Get the process-wide actuator (built once with its scanner)."""
+    return PresidioActuator()
+
+
 # NeMo Guardrails action functions
 def detect_pii_entities(text: str) -> List[Dict[str, Any]]:
     """NeMo Guardrails action for PII detection."""
-    actuator = PresidioActuator()
-    return actuator.detect_pii(text)
+    return get_presidio_actuator().detect_pii(text)
 
 
 def anonymize_pii_text(text: str) -> str:
     """NeMo Guardrails action for PII anonymization."""
-    actuator = PresidioActuator()
-    return actuator.anonymize_text(text)
+    return get_presidio_actuator().anonymize_text(text)
 
 
 def check_pii_risk_level(text: str) -> str:
     """NeMo Guardrails action for PII risk assessment."""
-    actuator = PresidioActuator()
-    entities = actuator.detect_pii(text)
-
-    # Risk assessment logic
-    high_risk_entities = ["CREDIT_CARD", "US_SSN", "US_PASSPORT", "IBAN_CODE"]
-    medium_risk_entities = ["EMAIL_ADDRESS", "PHONE_NUMBER", "PERSON"]
+    entities = get_presidio_actuator().detect_pii(text)
 
-    # Check for high-risk entities
+    # One pass: the first high-risk entity decides, medium is only a floor
+    risk_level = "low"
     for entity in entities:
-        if entity["type"] in high_risk_entities and entity["score"] >= 0.8:
-            return "high"
-
-    # Check for medium-risk entities
-    for entity in entities:
-        if entity["type"] in medium_risk_entities and entity["score"] >= 0.6:
-            return "medium"
-
-    # Low risk if no significant PII found
-    return "low"
+        entity_type = entity["type"]
+        if entity_type in HIGH_RISK:
+            if entity["score"] >= 0.8:
+                return "high"
+        elif entity_type in MEDIUM_RISK and entity["score"] >= 0.6:
+            risk_level = "medium"
+
+    return risk_level
@@ -4,30 +4,114 @@ Simple database models for Anzen Gateway (SQLite compatible)
 Simplified models that work with SQLite for demo purposes.
 """
 
+import atexit
+import copy
+import hashlib
 import logging
+import threading
+import time
 import uuid
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
-
-from sqlalchemy import (JSON, Boolean, Column, DateTime, Float, ForeignKey,
-                        Integer, String, Text, create_engine)
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime, timezone
+from enum import IntEnum
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from cachetools import TTLCache
+from prometheus_client import Counter as PrometheusCounter
+from prometheus_client import Histogram
+from sqlalchemy import (JSON, Boolean, Column, Date, DateTime, Float,
+                        ForeignKey, Index, Integer, LargeBinary, SmallInteger,
+                        String, Text, TypeDecorator, column, create_engine,
+                        event, func, insert, select, text, true)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import Session, relationship, sessionmaker
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Session, joinedload, relationship, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.sql.elements import ColumnElement
 
 logger = logging.getLogger(__name__)
 
 Base = declarative_base()
 
 
+class Decision(IntEnum):
+    """Policy decision, stored as a small integer."""
+
+    ALLOW = 0
+    BLOCK = 1
+    REDACT = 2
+    ALLOW_WITH_REDACTION = 3
+
+
+class RiskLevel(IntEnum):
+    """Risk level of the detected entities, stored as a small integer."""
+
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+
+
+def _enum_member(enum: Type[IntEnum], name: str) -> IntEnum:
+    """Look up an enum member by name (any case), raising ValueError if unknown."""
+    try:
+        return enum[name.upper()]
+    except (AttributeError, KeyError):
+        choices = ", ".join(member.name for member in enum)
+        raise ValueError(
+            f"Invalid {enum.__name__} {name!r}, expected one of: {choices}"
+        ) from None
+
+
+class IntEnumName(TypeDecorator):
+    """
+    SMALLINT column for an IntEnum that reads and writes member names.
+
+    Binds names (any case) or members; reads back names upper- or
+    lower-case, matching the strings the column used to hold.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum: Type[IntEnum], lowercase: bool = False):
+        super().__init__()
+        self.enum = enum
+        self.lowercase = lowercase
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        return int(_enum_member(self.enum, value))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        name = self.enum(value).name
+        return name.lower() if self.lowercase else name
+
+
+# Per-route counter incremented for each policy decision
+_ROUTE_COUNTERS = {"BLOCK": "blocked", "REDACT": "redacted", "ALLOW": "allowed"}
+
+
 class Organization(Base):
     """Organization/tenant model."""
 
     __tablename__ = "organizations"
+    # Server defaults (created_at) come back via RETURNING, not a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Stable external identifier; the integer id stays internal
+    public_id = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(255), nullable=False)
     slug = Column(String(100), unique=True, nullable=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Stamped by the database (CURRENT_TIMESTAMP, UTC) rather than in Python
+    created_at = Column(DateTime, server_default=func.now())
     is_active = Column(Boolean, default=True)
 
 
@@ -35,30 +119,42 @@ class User(Base):
     """User model."""
 
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    public_id = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()))
     email = Column(String(255), unique=True, nullable=False)
     name = Column(String(255), nullable=False)
     hashed_password = Column(String(255), nullable=False)
-    organization_id = Column(String(36), ForeignKey("organizations.id"), nullable=False)
+    organization_id = Column(
+        Integer, ForeignKey("organizations.id"), nullable=False, index=True
+    )
+    # Loaded with one IN query per batch of users rather than one per user
+    organization = relationship("Organization", lazy="selectin")
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, server_default=func.now())
 
 
 class APIKey(Base):
     """API key model."""
 
     __tablename__ = "api_keys"
+    __mapper_args__ = {"eager_defaults": True}
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    public_id = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(255), nullable=False)
     key_hash = Column(String(255), unique=True, nullable=False)
     key_prefix = Column(String(20), nullable=False)
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    organization_id = Column(String(36), ForeignKey("organizations.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    user = relationship("User", backref="api_keys", lazy="selectin")
+    organization_id = Column(
+        Integer, ForeignKey("organizations.id"), nullable=False, index=True
+    )
+    organization = relationship("Organization", lazy="selectin")
     is_active = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, server_default=func.now())
     expires_at = Column(DateTime, nullable=True)
     usage_count = Column(Integer, default=0)
 
@@ -67,19 +163,158 @@ class AuditLog(Base):
     """Audit log model."""
 
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Covers the compliance report's per-organization GROUP BYs
+        Index(
+            "ix_audit_org_decision_risk_route",
+            "organization_id",
+            "decision",
+            "risk_level",
+            "route",
+        ),
+        Index("ix_audit_org_created", "organization_id", "created_at"),
+        # Newest log per organization, for the report cache key
+        Index("ix_audit_logs_org", "organization_id"),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    public_id = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()))
     trace_id = Column(String(100), nullable=False, index=True)
-    organization_id = Column(String(36), ForeignKey("organizations.id"), nullable=False)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
     route = Column(String(100), nullable=False)
     method = Column(String(10), nullable=False)
     entity_count = Column(Integer, default=0)
-    risk_level = Column(String(20), nullable=False)
-    decision = Column(String(20), nullable=False)
-    input_hash = Column(String(64), nullable=True)
+    # {entity type: count} for the entities found in this request
+    entity_type_counts = Column(JSON, nullable=True)
+    risk_level = Column(IntEnumName(RiskLevel, lowercase=True), nullable=False)
+    decision = Column(IntEnumName(Decision), nullable=False)
+    # Raw 32-byte SHA-256 digest, half the size of its hex form
+    input_hash = Column(LargeBinary(32), nullable=True)
     text_length = Column(Integer, nullable=False)
     processing_time_ms = Column(Float, nullable=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime, server_default=func.now())
+
+    @hybrid_property
+    def input_hash_hex(self) -> Optional[str]:
+        """Hex form of ``input_hash`` for API responses."""
+        return self.input_hash.hex() if self.input_hash is not None else None
+
+    @input_hash_hex.expression
+    def input_hash_hex(cls):
+        return func.lower(func.hex(cls.input_hash))
+
+
+# Core INSERT for the audit writer's executemany batches: built once, and
+# skips the ORM bulk-insert bookkeeping an insert(AuditLog) goes through
+_AUDIT_INSERT = AuditLog.__table__.insert()
+
+
+class AuditLogSummary(Base):
+    """Daily audit log counts, kept up to date as logs are written."""
+
+    __tablename__ = "audit_log_summary"
+
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    bucket_date = Column(Date, primary_key=True)
+    route = Column(String(100), primary_key=True)
+    decision = Column(IntEnumName(Decision), primary_key=True)
+    risk_level = Column(IntEnumName(RiskLevel, lowercase=True), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class AuditEntitySummary(Base):
+    """Daily detected-entity counts per type, kept up to date like the above."""
+
+    __tablename__ = "audit_entity_summary"
+
+    organization_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    bucket_date = Column(Date, primary_key=True)
+    entity_type = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+# Primary keys of the summary rows, in column order
+_SUMMARY_KEY = ("organization_id", "bucket_date", "route", "decision", "risk_level")
+_ENTITY_SUMMARY_KEY = ("organization_id", "bucket_date", "entity_type")
+
+
+# Live decision counts and latencies for dashboards; the compliance report
+# stays the source for anything historical
+# Labels are bounded: routes are reduced to their policy prefix (as the
+# gateway's route policies see them) and organizations are left out, so
+# callers cannot mint new time series
+AUDIT_DECISIONS = PrometheusCounter(
+    "anzen_audit_decisions_total",
+    "Safety check decisions written to the simple audit log",
+    ["route_type", "decision", "risk_level"],
+)
+AUDIT_PROCESSING_MS = Histogram(
+    "anzen_audit_processing_ms",
+    "Safety check processing time in milliseconds",
+    ["route_type"],
+    buckets=(1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+_METRIC_ROUTE_TYPES = frozenset({"public", "private", "internal"})
+
+
+def _route_type(route: str) -> str:
+    route_type = route.split(":", 1)[0] if ":" in route else "public"
+    return route_type if route_type in _METRIC_ROUTE_TYPES else "other"
+
+
+# Compliance reports by (engine, organization, window, newest log id): a
+# new log changes the id, so entries never need invalidating on write
+_report_cache: TTLCache = TTLCache(maxsize=256, ttl=300)
+_report_cache_lock = threading.Lock()
+
+
+# Trigram full-text index over audit_logs' trace_id and route, kept in sync
+# by triggers, so substring searches don't scan the whole table
+AUDIT_FTS_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS audit_logs_fts USING fts5(
+        trace_id, route, content='audit_logs', content_rowid='id',
+        tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS audit_logs_fts_insert
+    AFTER INSERT ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts(rowid, trace_id, route)
+        VALUES (new.id, new.trace_id, new.route);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS audit_logs_fts_delete
+    AFTER DELETE ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts(audit_logs_fts, rowid, trace_id, route)
+        VALUES ('delete', old.id, old.trace_id, old.route);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS audit_logs_fts_update
+    AFTER UPDATE ON audit_logs BEGIN
+        INSERT INTO audit_logs_fts(audit_logs_fts, rowid, trace_id, route)
+        VALUES ('delete', old.id, old.trace_id, old.route);
+        INSERT INTO audit_logs_fts(rowid, trace_id, route)
+        VALUES (new.id, new.trace_id, new.route);
+    END""",
+)
+
+_AUDIT_FTS_MATCH = text(
+    "SELECT rowid FROM audit_logs_fts WHERE audit_logs_fts MATCH :query"
+).columns(column("rowid", Integer))
+
+
+# WAL lets reports read while the audit writer commits, and NORMAL syncs
+# only at checkpoints instead of twice per commit
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
 
 
 class SimpleDatabaseManager:
@@ -87,22 +322,74 @@ class SimpleDatabaseManager:
 
     def __init__(self, database_url: str = "sqlite:///anzen_demo.db"):
         self.database_url = database_url
-        self.engine = create_engine(database_url, echo=False)
+        if make_url(database_url).database in (None, "", ":memory:"):
+            # An in-memory database lives and dies with its connection, so the
+            # request threads and the audit writer must share a single one
+            options = {"poolclass": StaticPool}
+        else:
+            options = {
+                "poolclass": QueuePool,
+                "pool_size": 20,
+                "max_overflow": 40,
+                "pool_pre_ping": True,
+                "pool_recycle": 3600,
+            }
+        # Shared with the audit writer thread, so connections may cross threads
+        self.engine = create_engine(
+            database_url,
+            echo=False,
+            connect_args={"check_same_thread": False},
+            **options,
+        )
+        event.listen(self.engine, "connect", _set_sqlite_pragmas)
+        # Committed objects keep their loaded state, so returning one from a
+        # create_* helper doesn't cost a reload
         self.SessionLocal = sessionmaker(
-            autocommit=False, autoflush=False, bind=self.engine
+            autocommit=False, autoflush=False, expire_on_commit=False, bind=self.engine
         )
 
     def create_tables(self):
         """Create all database tables."""
         Base.metadata.create_all(bind=self.engine)
+        try:
+            with self.engine.begin() as conn:
+                indexed = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'audit_logs_fts'"
+                ).first()
+                for statement in AUDIT_FTS_DDL:
+                    conn.exec_driver_sql(statement)
+                if indexed is None:
+                    # Index any logs written before the search table existed
+                    conn.exec_driver_sql(
+                        "INSERT INTO audit_logs_fts(audit_logs_fts) VALUES ('rebuild')"
+                    )
+        except OperationalError as e:
+            logger.warning("Audit log search unavailable (no FTS5 trigram): %s", e)
         logger.info("Database tables created")
 
     def get_session(self) -> Session:
         """Get a database session."""
         return self.SessionLocal()
 
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """Yield a session that is committed on success, rolled back on error."""
+        session = self.SessionLocal()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
     def close(self):
-        """Close database connections."""
+        """Write pending audit logs, then close database connections."""
+        with _audit_writers_lock:
+            writer = _audit_writers.pop(self.engine, None)
+        if writer is not None:
+            writer.close()
         self.engine.dispose()
 
 
@@ -110,12 +397,12 @@ def create_simple_user(
     email: str,
     name: str,
     password: str,
-    organization_id: str,
+    organization_id: int,
     db: Session,
     is_admin: bool = False,
 ) -> User:
     """Create a simple user."""
-    from packages.gateway.src.anzen_gateway.auth import AuthManager
+    from .auth import AuthManager
 
     # Check if user exists
     existing = db.query(User).filter(User.email == email).first()
@@ -134,15 +421,14 @@ def create_simple_user(
 
     db.add(user)
     db.commit()
-    db.refresh(user)
     return user
 
 
 def create_simple_api_key(
-    name: str, user_id: str, organization_id: str, db: Session
+    name: str, user_id: int, organization_id: int, db: Session
 ) -> tuple:
     """Create a simple API key."""
-    from packages.gateway.src.anzen_gateway.auth import AuthManager
+    from .auth import AuthManager
 
     # Generate key
     full_key, key_hash, key_prefix = AuthManager.generate_api_key()
@@ -158,15 +444,262 @@ def create_simple_api_key(
 
     db.add(api_key)
     db.commit()
-    db.refresh(api_key)
 
     return full_key, api_key
 
 
+def get_simple_api_key(key_hash: str, db: Session) -> Optional[APIKey]:
+    """Look up an active API key with its user and organization in one query."""
+    return (
+        db.query(APIKey)
+        .options(
+            joinedload(APIKey.user).joinedload(User.organization),
+            joinedload(APIKey.organization),
+        )
+        .filter(APIKey.key_hash == key_hash, APIKey.is_active == True)
+        .first()
+    )
+
+
+def _upsert_counts(db: Session, model, key: Tuple[str, ...], counts: Counter):
+    """Add ``counts`` (keyed by tuples of ``key`` values) to ``model.count``."""
+    if not counts:
+        return
+    stmt = sqlite_insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(key),
+        set_={"count": model.count + stmt.excluded.count},
+    )
+    db.execute(
+        stmt, [dict(zip(key, values), count=count) for values, count in counts.items()]
+    )
+
+
+def _add_to_summary(db: Session, logs: Iterable[Dict[str, Any]]):
+    """Add audit log rows to their daily summary counts (not committed)."""
+    counts = Counter()
+    entity_counts = Counter()
+    for log in logs:
+        organization_id = log["organization_id"]
+        bucket_date = log["created_at"].date()
+        counts[
+            (
+                organization_id,
+                bucket_date,
+                log["route"],
+                log["decision"],
+                log["risk_level"],
+            )
+        ] += 1
+        for entity_type, count in (log.get("entity_type_counts") or {}).items():
+            entity_counts[(organization_id, bucket_date, entity_type)] += count
+
+    _upsert_counts(db, AuditLogSummary, _SUMMARY_KEY, counts)
+    _upsert_counts(db, AuditEntitySummary, _ENTITY_SUMMARY_KEY, entity_counts)
+
+
+def rebuild_simple_audit_summary(db: Session, organization_id: Optional[int] = None):
+    """
+    Recompute the summary tables from the audit logs.
+
+    Only needed for logs written before the summary tables existed; new logs
+    are counted as they are written.
+    """
+    bucket_date = func.date(AuditLog.created_at)
+    logs = select(
+        AuditLog.organization_id,
+        bucket_date,
+        AuditLog.route,
+        AuditLog.decision,
+        AuditLog.risk_level,
+        func.count(),
+    ).group_by(
+        AuditLog.organization_id,
+        bucket_date,
+        AuditLog.route,
+        AuditLog.decision,
+        AuditLog.risk_level,
+    )
+    # Entity histograms are summed inside SQLite via json_each
+    entity = func.json_each(AuditLog.entity_type_counts).table_valued("key", "value")
+    entities = (
+        select(
+            AuditLog.organization_id,
+            bucket_date,
+            entity.c.key,
+            func.sum(entity.c.value),
+        )
+        .select_from(AuditLog)
+        .join(entity, true())
+        .group_by(AuditLog.organization_id, bucket_date, entity.c.key)
+    )
+
+    stale = db.query(AuditLogSummary)
+    stale_entities = db.query(AuditEntitySummary)
+    if organization_id is not None:
+        stale = stale.filter(AuditLogSummary.organization_id == organization_id)
+        stale_entities = stale_entities.filter(
+            AuditEntitySummary.organization_id == organization_id
+        )
+        logs = logs.where(AuditLog.organization_id == organization_id)
+        entities = entities.where(AuditLog.organization_id == organization_id)
+    stale.delete(synchronize_session=False)
+    stale_entities.delete(synchronize_session=False)
+
+    db.execute(insert(AuditLogSummary).from_select([*_SUMMARY_KEY, "count"], logs))
+    db.execute(
+        insert(AuditEntitySummary).from_select(
+            [*_ENTITY_SUMMARY_KEY, "count"], entities
+        )
+    )
+    db.commit()
+
+    # Rebuilt counts don't change the newest log ids the cache is keyed by
+    with _report_cache_lock:
+        _report_cache.clear()
+
+
+class SimpleAuditWriter:
+    """Background thread that batch-inserts audit logs for one engine."""
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = 500,
+        flush_interval: float = 0.1,
+        maxsize: int = 10_000,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.maxsize = maxsize
+        self._session_factory = sessionmaker(bind=engine)
+
+        # (enqueued at, row) pairs waiting for the next batch
+        self._buffer: List[Tuple[float, Dict[str, Any]]] = []
+        # Enqueue time of the oldest row in the batch being inserted
+        self._in_flight_since: Optional[float] = None
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run, name="simple-audit-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, row: Dict[str, Any]):
+        """
+        Queue a row for insertion.
+
+        Rows are dropped (and logged) if the queue is full, so a stalled
+        database cannot grow memory without bound.
+        """
+        with self._cond:
+            if not self._closed:
+                if len(self._buffer) >= self.maxsize:
+                    logger.error(
+                        "Audit queue full, dropping audit log %s", row["trace_id"]
+                    )
+                    return
+                self._buffer.append((time.monotonic(), row))
+                # Wake the writer to start a batch window, or to cut it short
+                if len(self._buffer) in (1, self.batch_size):
+                    self._cond.notify_all()
+                return
+        self._insert([row])
+
+    def flush(self):
+        """Block until every queued row has been inserted."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: not self._buffer and self._in_flight_since is None
+            )
+
+    def staleness_seconds(self) -> float:
+        """How long the oldest row not yet in the database has been waiting."""
+        with self._cond:
+            oldest = self._in_flight_since
+            if oldest is None and self._buffer:
+                oldest = self._buffer[0][0]
+        return 0.0 if oldest is None else time.monotonic() - oldest
+
+    def close(self):
+        """Insert whatever is still queued and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        """Insert every ``batch_size`` rows or ``flush_interval`` seconds."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._buffer or self._closed)
+                if not self._buffer:
+                    return
+                deadline = self._buffer[0][0] + self.flush_interval
+                while len(self._buffer) < self.batch_size and not self._closed:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                batch = self._buffer[: self.batch_size]
+                del self._buffer[: self.batch_size]
+                self._in_flight_since = batch[0][0]
+
+            self._insert([row for _, row in batch])
+            with self._cond:
+                self._in_flight_since = None
+                self._cond.notify_all()
+
+    def _insert(self, rows: List[Dict[str, Any]]):
+        """
+        Insert rows and their summary counts in one transaction.
+
+        If the batch fails, rows are retried one at a time so a single bad
+        row only loses itself.
+        """
+        try:
+            with self._session_factory() as session:
+                session.execute(_AUDIT_INSERT, rows)
+                _add_to_summary(session, rows)
+                session.commit()
+            logger.debug("Inserted %d audit logs", len(rows))
+            return
+        except Exception as e:
+            if len(rows) == 1:
+                logger.error(
+                    "Failed to insert audit log %s: %s", rows[0]["trace_id"], e
+                )
+                return
+            logger.warning(
+                "Failed to insert %d audit logs, retrying one by one: %s", len(rows), e
+            )
+
+        for row in rows:
+            self._insert([row])
+
+
+# One writer per engine, created on first use
+_audit_writers: Dict[Engine, SimpleAuditWriter] = {}
+_audit_writers_lock = threading.Lock()
+
+
+def get_simple_audit_writer(engine: Engine) -> SimpleAuditWriter:
+    """Get the audit writer for an engine, starting it if needed."""
+    with _audit_writers_lock:
+        writer = _audit_writers.get(engine)
+        if writer is None:
+            writer = _audit_writers[engine] = SimpleAuditWriter(engine)
+        return writer
+
+
 def log_simple_audit(
     db: Session,
     trace_id: str,
-    organization_id: str,
+    organization_id: int,
     route: str,
     method: str,
     text: str,
@@ -174,57 +707,188 @@ def log_simple_audit(
     risk_level: str,
     decision: str,
     processing_time: float,
+    input_hash: Optional[bytes] = None,
 ):
-    """Log a simple audit entry."""
-    import hashlib
+    """
+    Log a simple audit entry.
+
+    The row is queued and inserted by a background batch, so ``db`` is only
+    used to find the engine; the returned log is not attached to a session
+    and only carries its ``public_id``. Callers that already hashed ``text``
+    can pass its raw SHA-256 digest as ``input_hash`` to skip re-hashing it.
+
+    Raises:
+        ValueError: If ``risk_level`` or ``decision`` is not a known value;
+            checked here because the background insert cannot report it
+    """
+    # Canonical names, matching what the columns read back
+    risk_level = _enum_member(RiskLevel, risk_level).name.lower()
+    decision = _enum_member(Decision, decision).name
 
     # Hash text for privacy
-    input_hash = hashlib.sha256(text.encode()).hexdigest()
-
-    # Extract entity types
-    entity_types = [e.get("type", "UNKNOWN") for e in entities]
-
-    audit_log = AuditLog(
-        trace_id=trace_id,
-        organization_id=organization_id,
-        route=route,
-        method=method,
-        entity_count=len(entities),
-        risk_level=risk_level,
-        decision=decision,
-        input_hash=input_hash,
-        text_length=len(text),
-        processing_time_ms=processing_time,
+    if input_hash is None:
+        input_hash = hashlib.sha256(text.encode()).digest()
+
+    row = {
+        # The integer id is assigned by the batch insert and never read back;
+        # the public id identifies the log in the meantime
+        "public_id": str(uuid.uuid4()),
+        "trace_id": trace_id,
+        "organization_id": organization_id,
+        "route": route,
+        "method": method,
+        "entity_count": len(entities),
+        "entity_type_counts": dict(Counter(e.get("type", "UNKNOWN") for e in entities)),
+        "risk_level": risk_level,
+        "decision": decision,
+        "input_hash": input_hash,
+        "text_length": len(text),
+        "processing_time_ms": processing_time,
+        # Set here rather than by the server default: the summary bucket is
+        # taken from it before the row reaches the database
+        "created_at": datetime.now(timezone.utc),
+    }
+    get_simple_audit_writer(db.get_bind()).submit(row)
+    route_type = _route_type(route)
+    AUDIT_DECISIONS.labels(route_type, decision, risk_level).inc()
+    AUDIT_PROCESSING_MS.labels(route_type).observe(processing_time)
+
+    return AuditLog(**row)
+
+
+def _audit_staleness(engine: Engine) -> float:
+    with _audit_writers_lock:
+        writer = _audit_writers.get(engine)
+    return writer.staleness_seconds() if writer is not None else 0.0
+
+
+def search_simple_audit_logs(
+    db: Session, organization_id: int, query: str, limit: int = 100
+) -> List[AuditLog]:
+    """
+    Find audit logs whose trace id or route contains ``query``.
+
+    Args:
+        db: Database session
+        organization_id: Organization whose logs to search
+        query: Substring to look for (at least 3 characters)
+        limit: Maximum number of logs to return
+
+    Returns:
+        Matching logs, newest first
+    """
+    # Quoted as one FTS5 string, so the query is never parsed as syntax
+    phrase = '"' + query.replace('"', '""') + '"'
+    return (
+        db.query(AuditLog)
+        .filter(
+            AuditLog.id.in_(_AUDIT_FTS_MATCH.bindparams(query=phrase)),
+            AuditLog.organization_id == organization_id,
+        )
+        .order_by(AuditLog.id.desc())
+        .limit(limit)
+        .all()
     )
 
-    db.add(audit_log)
-    db.commit()
-    db.refresh(audit_log)
-
-    return audit_log
 
+def _summary_window(
+    model, organization_id: int, start: Optional[date], end: Optional[date]
+) -> List[ColumnElement]:
+    """Conditions selecting an organization's summary rows in [start, end)."""
+    conditions = [model.organization_id == organization_id]
+    if start is not None:
+        conditions.append(model.bucket_date >= start)
+    if end is not None:
+        conditions.append(model.bucket_date < end)
+    return conditions
 
-def get_simple_compliance_report(db: Session, organization_id: str) -> Dict[str, Any]:
-    """Get a simple compliance report."""
-    logs = db.query(AuditLog).filter(AuditLog.organization_id == organization_id).all()
 
-    total = len(logs)
-    blocked = len([log for log in logs if log.decision == "BLOCK"])
-    redacted = len([log for log in logs if log.decision == "REDACT"])
-    allowed = len([log for log in logs if log.decision == "ALLOW"])
+def get_simple_compliance_report(
+    db: Session,
+    organization_id: int,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Get a simple compliance report from the daily summary counts.
+
+    Reports are cached until the organization's next audit log is inserted.
+
+    Args:
+        db: Database session
+        organization_id: Organization to report on
+        start: First day (UTC) to include; all history if omitted
+        end: Day (UTC) to stop before; up to now if omitted
+
+    Returns:
+        Report with summary, risk level, route and entity type breakdowns
+    """
+    engine = db.get_bind()
+    # One index seek: the rowid is the last column of ix_audit_logs_org
+    newest_id = (
+        db.query(func.max(AuditLog.id))
+        .filter(AuditLog.organization_id == organization_id)
+        .scalar()
+    )
+    key = (engine, organization_id, start, end, newest_id)
+    with _report_cache_lock:
+        cached = _report_cache.get(key)
+    if cached is None:
+        cached = _build_compliance_report(db, organization_id, start, end)
+        with _report_cache_lock:
+            _report_cache[key] = cached
+
+    report = copy.deepcopy(cached)
+    # Summary rows are updated in the same transaction as each log batch
+    report["meta"] = {"staleness_seconds": _audit_staleness(engine)}
+    return report
+
+
+def _build_compliance_report(
+    db: Session, organization_id: int, start: Optional[date], end: Optional[date]
+) -> Dict[str, Any]:
+    groups = (
+        db.query(
+            AuditLogSummary.route,
+            AuditLogSummary.decision,
+            AuditLogSummary.risk_level,
+            func.sum(AuditLogSummary.count),
+        )
+        .filter(*_summary_window(AuditLogSummary, organization_id, start, end))
+        .group_by(
+            AuditLogSummary.route, AuditLogSummary.decision, AuditLogSummary.risk_level
+        )
+        .all()
+    )
 
-    # Risk level breakdown
+    decisions = Counter()
     risk_levels = {"low": 0, "medium": 0, "high": 0}
-    for log in logs:
-        risk_levels[log.risk_level] = risk_levels.get(log.risk_level, 0) + 1
-
-    # Route breakdown
     routes = {}
-    for log in logs:
-        if log.route not in routes:
-            routes[log.route] = {"total": 0, "blocked": 0, "redacted": 0, "allowed": 0}
-        routes[log.route]["total"] += 1
-        routes[log.route][log.decision.lower()] += 1
+    for route, decision, risk_level, count in groups:
+        decisions[decision] += count
+
+        # Risk level breakdown
+        risk_levels[risk_level] = risk_levels.get(risk_level, 0) + count
+
+        # Route breakdown
+        if route not in routes:
+            routes[route] = {"total": 0, "blocked": 0, "redacted": 0, "allowed": 0}
+        routes[route]["total"] += count
+        counter = _ROUTE_COUNTERS.get(decision)
+        if counter is not None:
+            routes[route][counter] += count
+
+    by_entity_type = dict(
+        db.query(AuditEntitySummary.entity_type, func.sum(AuditEntitySummary.count))
+        .filter(*_summary_window(AuditEntitySummary, organization_id, start, end))
+        .group_by(AuditEntitySummary.entity_type)
+        .all()
+    )
+
+    total = sum(decisions.values())
+    blocked = decisions["BLOCK"]
+    redacted = decisions["REDACT"]
+    allowed = decisions["ALLOW"]
 
     return {
         "summary": {
@@ -237,4 +901,5 @@ def get_simple_compliance_report(db: Session, organization_id: str) -> Dict[str,
         },
         "risk_levels": risk_levels,
         "routes": routes,
+        "by_entity_type": by_entity_type,
     }
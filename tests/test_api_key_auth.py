@@ -0,0 +1,159 @@
+"""
+Tests for API key validation and hash migration (anzen_gateway.auth).
+"""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select, update
+
+from anzen_gateway import auth
+from anzen_gateway.auth import (
+    AuthManager,
+    create_api_key,
+    create_user,
+    invalidate_api_key,
+    validate_api_key,
+)
+from anzen_gateway.database import APIKey, DatabaseManager, Organization, User
+
+
+@pytest.fixture(autouse=True)
+def clear_api_key_cache():
+    auth._api_key_cache.clear()
+    yield
+    auth._api_key_cache.clear()
+
+
+@pytest_asyncio.fixture
+async def db_manager(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'auth.db'}")
+    manager.create_tables()
+    yield manager
+    await manager.close_async()
+
+
+@pytest.fixture
+def api_key(db_manager):
+    """A fresh key for an active user; returns (full key, key id)."""
+    with db_manager.get_session() as db:
+        organization = Organization(name="Test", slug="test")
+        db.add(organization)
+        db.flush()
+        user = create_user(
+            email="user@example.com",
+            name="User",
+            password="unused",
+            organization_id=organization.id,
+            db=db,
+            hashed_password="$argon2id$placeholder",
+        )
+        full_key, record = create_api_key("test", user.id, organization.id, db)
+        return full_key, record.id
+
+
+def bearer(key):
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=key)
+
+
+def stored_hash(db_manager, key_id):
+    with db_manager.get_session() as db:
+        return db.execute(select(APIKey.key_hash).where(APIKey.id == key_id)).scalar()
+
+
+class TestValidateApiKey:
+    """Test validation, caching and the SHA-256 -> BLAKE3 migration."""
+
+    @pytest.mark.asyncio
+    async def test_valid_key(self, db_manager, api_key):
+        """A valid key resolves to its record, user and organization."""
+        full_key, key_id = api_key
+
+        record, user, organization = await validate_api_key(
+            bearer(full_key), db_manager
+        )
+
+        assert record.id == key_id
+        assert user.email == "user@example.com"
+        assert organization.slug == "test"
+        assert AuthManager.hash_api_key(full_key) in auth._api_key_cache
+
+    @pytest.mark.asyncio
+    async def test_legacy_hash_is_migrated(self, db_manager, api_key):
+        """A key stored as SHA-256 still validates and is rehashed."""
+        full_key, key_id = api_key
+        legacy = hashlib.sha256(full_key.encode()).hexdigest()
+        with db_manager.get_session() as db:
+            db.execute(
+                update(APIKey).where(APIKey.id == key_id).values(key_hash=legacy)
+            )
+            db.commit()
+
+        record, _, _ = await validate_api_key(bearer(full_key), db_manager)
+
+        assert record.key_hash == AuthManager.hash_api_key(full_key)
+        assert stored_hash(db_manager, key_id) == AuthManager.hash_api_key(full_key)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("key", ["ak_short", "not-a-key", ""])
+    async def test_malformed_key(self, db_manager, key):
+        """Keys that can't be valid are rejected up front."""
+        with pytest.raises(HTTPException) as exc:
+            await validate_api_key(bearer(key), db_manager)
+        assert exc.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_unknown_key(self, db_manager, api_key):
+        """A well-formed key that was never issued is rejected."""
+        unknown, _, _ = AuthManager.generate_api_key()
+
+        with pytest.raises(HTTPException) as exc:
+            await validate_api_key(bearer(unknown), db_manager)
+        assert exc.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_revoked_key(self, db_manager, api_key):
+        """Revoking a key and invalidating it locally rejects it at once."""
+        full_key, key_id = api_key
+        await validate_api_key(bearer(full_key), db_manager)
+        with db_manager.get_session() as db:
+            db.execute(
+                update(APIKey).where(APIKey.id == key_id).values(is_active=False)
+            )
+            db.commit()
+
+        invalidate_api_key(AuthManager.hash_api_key(full_key))
+
+        with pytest.raises(HTTPException):
+            await validate_api_key(bearer(full_key), db_manager)
+
+    @pytest.mark.asyncio
+    async def test_inactive_user(self, db_manager, api_key):
+        """Keys of deactivated users are rejected."""
+        full_key, _ = api_key
+        with db_manager.get_session() as db:
+            db.execute(update(User).values(is_active=False))
+            db.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            await validate_api_key(bearer(full_key), db_manager)
+        assert exc.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_expired_key(self, db_manager, api_key):
+        """Keys past their expiry are rejected, cached or not."""
+        full_key, key_id = api_key
+        expired = datetime.now(timezone.utc) - timedelta(days=1)
+        with db_manager.get_session() as db:
+            db.execute(
+                update(APIKey).where(APIKey.id == key_id).values(expires_at=expired)
+            )
+            db.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            await validate_api_key(bearer(full_key), db_manager)
+        assert exc.value.detail == "API key expired"
@@ -0,0 +1,120 @@
+"""
+Tests for the gateway's background audit inserter (anzen_gateway.audit).
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from anzen_gateway.audit import AuditBatchWriter
+from anzen_gateway.database import AuditLog, Base
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    path = tmp_path / "audit.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return path
+
+
+@pytest_asyncio.fixture
+async def session_factory(database_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    yield async_sessionmaker(engine)
+    await engine.dispose()
+
+
+def audit_row(trace_id):
+    return {
+        "id": str(uuid.uuid4()),
+        "trace_id": trace_id,
+        "organization_id": "org",
+        "route": "public:chat",
+        "method": "input",
+        "input_hash": "0" * 64,
+        "entities_detected": [],
+        "entity_count": 0,
+        "risk_level": "low",
+        "decision": "ALLOW",
+        "text_length": 5,
+        "processing_time_ms": 1.0,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+async def stored_trace_ids(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(select(AuditLog.trace_id))
+        return sorted(result.scalars())
+
+
+class TestAuditBatchWriter:
+    """Test batching, draining and failure isolation."""
+
+    @pytest.mark.asyncio
+    async def test_flushes_after_interval(self, session_factory):
+        """Rows are inserted once the flush interval passes."""
+        writer = AuditBatchWriter(session_factory, flush_interval=0.01)
+
+        writer.submit(audit_row("t1"))
+        writer.submit(audit_row("t2"))
+        await asyncio.sleep(0.2)
+
+        assert await stored_trace_ids(session_factory) == ["t1", "t2"]
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_close_drains_rows_already_dequeued(self, session_factory):
+        """Rows the consumer has taken into its batch survive close."""
+        writer = AuditBatchWriter(session_factory, batch_size=4, flush_interval=10)
+
+        for i in range(10):
+            writer.submit(audit_row(f"t{i}"))
+        # Let the consumer pull a batch off the queue before closing
+        await asyncio.sleep(0)
+        await writer.close()
+
+        assert len(await stored_trace_ids(session_factory)) == 10
+
+    @pytest.mark.asyncio
+    async def test_bad_row_only_loses_itself(self, session_factory):
+        """A failed batch is retried row by row."""
+        writer = AuditBatchWriter(session_factory, batch_size=10)
+
+        for i in range(5):
+            row = audit_row(f"t{i}")
+            if i == 2:
+                row["trace_id"] = None  # violates NOT NULL
+            writer.submit(row)
+        await writer.close()
+
+        assert await stored_trace_ids(session_factory) == ["t0", "t1", "t3", "t4"]
+
+    @pytest.mark.asyncio
+    async def test_drops_rows_when_queue_full(self, session_factory):
+        """Submissions beyond ``maxsize`` are dropped, not buffered."""
+        writer = AuditBatchWriter(session_factory, maxsize=2)
+
+        for i in range(3):
+            writer.submit(audit_row(f"t{i}"))
+        await writer.close()
+
+        assert await stored_trace_ids(session_factory) == ["t0", "t1"]
+
+    @pytest.mark.asyncio
+    async def test_close_without_rows(self, session_factory):
+        """Closing an unused writer is a no-op."""
+        writer = AuditBatchWriter(session_factory)
+
+        await writer.close()
+
+        async with session_factory() as session:
+            count = await session.scalar(select(func.count()).select_from(AuditLog))
+        assert count == 0
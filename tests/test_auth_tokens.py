@@ -0,0 +1,105 @@
+"""
+Tests for access token signing and verification (anzen_gateway.auth).
+"""
+
+import time
+from datetime import timedelta
+
+import pytest
+from jose import jwt
+
+from anzen_gateway import auth
+from anzen_gateway.auth import AuthenticationError, AuthManager
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    auth._token_cache.clear()
+    yield
+    auth._token_cache.clear()
+
+
+def jose_token(claims):
+    return jwt.encode(claims, auth._SIGNING_KEY, algorithm="HS256")
+
+
+class TestHS256FastPath:
+    """Test the jose-free HS256 path against jose itself."""
+
+    def test_token_matches_jose(self):
+        """Fast-path tokens are byte-identical to jose's."""
+        token = AuthManager.create_access_token({"sub": "user-1"})
+        payload = jwt.decode(token, auth._SIGNING_KEY, algorithms=["HS256"])
+
+        assert token == jose_token(payload)
+
+    def test_round_trip(self):
+        """A fresh token verifies on the fast path."""
+        token = AuthManager.create_access_token({"sub": "user-1"})
+
+        assert AuthManager._fast_hs256_verify(token)["sub"] == "user-1"
+        assert AuthManager.verify_token(token)["sub"] == "user-1"
+
+    def test_verifies_jose_issued_token(self):
+        """Tokens jose signed with the same claims take the fast path."""
+        token = jose_token({"sub": "user-1", "exp": int(time.time()) + 60})
+
+        assert AuthManager._fast_hs256_verify(token)["sub"] == "user-1"
+
+    def test_rejects_tampered_signature(self):
+        """A token whose signature doesn't match is rejected."""
+        token = AuthManager.create_access_token({"sub": "user-1"})
+        head, _, signature = token.rpartition(".")
+        tampered = head + "." + ("A" if signature[0] != "A" else "B") + signature[1:]
+
+        with pytest.raises(AuthenticationError):
+            AuthManager.verify_token(tampered)
+
+    def test_rejects_tampered_payload(self):
+        """Changing the claims invalidates the signature."""
+        token = AuthManager.create_access_token({"sub": "user-1"})
+        other = AuthManager.create_access_token({"sub": "user-2"})
+        header, _, signature = token.split(".")
+        forged = ".".join([header, other.split(".")[1], signature])
+
+        with pytest.raises(AuthenticationError):
+            AuthManager.verify_token(forged)
+
+    def test_rejects_expired_token(self):
+        """Expired tokens fail on the fast path."""
+        token = AuthManager.create_access_token(
+            {"sub": "user-1"}, expires_delta=timedelta(seconds=-1)
+        )
+
+        with pytest.raises(AuthenticationError):
+            AuthManager._fast_hs256_verify(token)
+        with pytest.raises(AuthenticationError):
+            AuthManager.verify_token(token)
+
+    def test_extra_claims_fall_back_to_jose(self):
+        """Claims the fast path doesn't check are left to jose."""
+        token = jose_token({"sub": "user-1", "nbf": int(time.time()) + 3600})
+
+        assert AuthManager._fast_hs256_verify(token) is None
+        # jose enforces "nbf", which the fast path would have ignored
+        with pytest.raises(AuthenticationError):
+            AuthManager.verify_token(token)
+
+    def test_other_header_falls_back_to_jose(self):
+        """Tokens with a different header are verified by jose."""
+        token = jwt.encode(
+            {"sub": "user-1"},
+            auth._SIGNING_KEY,
+            algorithm="HS256",
+            headers={"kid": "1"},
+        )
+
+        assert AuthManager._fast_hs256_verify(token) is None
+        assert AuthManager.verify_token(token)["sub"] == "user-1"
+
+    def test_invalid_token_is_not_cached(self):
+        """A rejected token is verified again on every call."""
+        with pytest.raises(AuthenticationError):
+            AuthManager.verify_token("not.a.token")
+
+        assert len(auth._token_cache) == 0
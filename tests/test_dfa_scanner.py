@@ -0,0 +1,110 @@
+"""
+Tests for the multi-pattern PII prefilter (anzen_gateway.dfa_scanner).
+"""
+
+import re
+
+import pytest
+
+from anzen_gateway import dfa_scanner
+from anzen_gateway.dfa_scanner import DFAScanner, _re2_pattern
+from anzen_gateway.presidio_actuator import PII_PATTERNS
+
+TEXTS = [
+    "",
+    "nothing sensitive here",
+    "mail john.doe@example.com today",
+    "call (555) 123-4567 or +1 555.123.4567",
+    "ssn 123-45-6789, card 4111 1111 1111 1111",
+    "iban DE89370400440532013000 passport C12345678",
+    "server at 192.168.10.1",
+    "John Smith met Jane Doe",
+    "José Álvarez wrote to josé@example.com",
+    "tabs\x0band\x1cseparators 555\x0b123\x0b4567",
+    "digits 12 but no entity",
+]
+
+TIERS = {
+    "hyperscan": (True, False),
+    "re2": (False, True),
+    "triggers": (False, False),
+}
+
+
+@pytest.fixture(params=list(TIERS))
+def scanner(request, monkeypatch):
+    """A scanner over the actuator's patterns, forced onto one tier."""
+    use_hyperscan, use_re2 = TIERS[request.param]
+    if use_hyperscan and not dfa_scanner.HYPERSCAN_AVAILABLE:
+        pytest.skip("hyperscan not installed")
+    if use_re2 and not dfa_scanner.RE2_AVAILABLE:
+        pytest.skip("google-re2 not installed")
+    monkeypatch.setattr(dfa_scanner, "HYPERSCAN_AVAILABLE", use_hyperscan)
+    monkeypatch.setattr(dfa_scanner, "RE2_AVAILABLE", use_re2)
+
+    scanner = DFAScanner(PII_PATTERNS)
+    assert (scanner._database is not None) == use_hyperscan
+    assert (scanner._re2_set is not None) == use_re2
+    return scanner
+
+
+class TestDFAScanner:
+    """Test that every tier is a sound prefilter."""
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_never_misses_a_matching_type(self, scanner, text):
+        """Every type the exact regex finds is a candidate."""
+        expected = {t for t, p in PII_PATTERNS.items() if p.search(text)}
+
+        assert expected <= set(scanner.candidates(text))
+
+    def test_candidates_keep_pattern_order(self, scanner):
+        """Candidates come back in the order the patterns were given."""
+        text = "John Smith, john@example.com, 123-45-6789, 10.0.0.1"
+        candidates = scanner.candidates(text)
+
+        assert candidates == [t for t in PII_PATTERNS if t in candidates]
+
+    def test_filters_out_impossible_types(self, scanner):
+        """Text without digits or '@' rules out every numeric type and email."""
+        candidates = scanner.candidates("just some lowercase words")
+
+        assert candidates in ([], ["PERSON"])
+
+    def test_re2_tier_rejects_partial_digits(self, monkeypatch):
+        """Unlike the triggers, RE2 drops types whose full pattern is absent."""
+        if not dfa_scanner.RE2_AVAILABLE:
+            pytest.skip("google-re2 not installed")
+        monkeypatch.setattr(dfa_scanner, "HYPERSCAN_AVAILABLE", False)
+
+        candidates = DFAScanner(PII_PATTERNS).candidates("digits 12 but no entity")
+
+        assert "US_SSN" not in candidates
+        assert "CREDIT_CARD" not in candidates
+
+
+class TestRe2Pattern:
+    """Test the re -> RE2 whitespace translation."""
+
+    def test_widens_whitespace_outside_class(self):
+        """A bare \\s becomes a class with the extra separators."""
+        assert _re2_pattern(r"a\sb") == r"a[\s\x0b\x1c-\x1f]b"
+
+    def test_widens_whitespace_inside_class(self):
+        """Inside a class the separators are added in place."""
+        assert _re2_pattern(r"[-.\s]") == r"[-.\s\x0b\x1c-\x1f]"
+
+    def test_leaves_other_escapes(self):
+        """Other escapes pass through unchanged."""
+        assert _re2_pattern(r"\d\.\b") == r"\d\.\b"
+
+    @pytest.mark.parametrize("separator", ["\x0b", "\x1c", "\x1f", " ", "\t"])
+    def test_translation_matches_what_re_matches(self, separator):
+        """RE2 matches every separator ``re`` treats as whitespace."""
+        if not dfa_scanner.RE2_AVAILABLE:
+            pytest.skip("google-re2 not installed")
+        pattern = r"\d{3}[-.\s]?\d{4}"
+        text = f"555{separator}1234"
+
+        assert re.search(pattern, text)
+        assert dfa_scanner.re2.search(_re2_pattern(pattern), text)
@@ -0,0 +1,179 @@
+"""
+Tests for the agent's completion cache (anzen_agent.llm_cache).
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from anzen_agent.llm_cache import LLMCache
+
+DIM = 8
+
+
+def unit(*components):
+    vector = np.zeros(DIM)
+    vector[: len(components)] = components
+    return list(vector / np.linalg.norm(vector))
+
+
+class FakeEmbeddings:
+    """Embeddings endpoint returning fixed vectors per input text."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = []
+
+    async def create(self, model, input):
+        self.calls.append(input)
+        if input not in self.vectors:
+            raise RuntimeError("embedding service unavailable")
+        return SimpleNamespace(data=[SimpleNamespace(embedding=self.vectors[input])])
+
+
+def make_cache(vectors, **kwargs):
+    embeddings = FakeEmbeddings(vectors)
+    cache = LLMCache(SimpleNamespace(embeddings=embeddings), **kwargs)
+    return cache, embeddings
+
+
+def completion(text, calls):
+    async def fn():
+        calls.append(text)
+        return text
+
+    return fn
+
+
+class TestLLMCache:
+    """Test exact and semantic reuse of completions."""
+
+    def test_make_key_is_order_independent_and_exact(self):
+        """Keys ignore dict ordering but not request parameters."""
+        messages = [{"role": "user", "content": "hi"}]
+        key = LLMCache.make_key("m", messages, 0.1)
+
+        assert key == LLMCache.make_key("m", [{"content": "hi", "role": "user"}], 0.1)
+        assert key != LLMCache.make_key("m", messages, 0.2)
+
+    def test_cacheable(self):
+        """Only low-temperature completions are reused."""
+        cache = LLMCache(max_temperature=0.3)
+
+        assert cache.cacheable(0.1)
+        assert not cache.cacheable(0.7)
+
+    @pytest.mark.asyncio
+    async def test_exact_hit_skips_completion(self):
+        """A repeated key is served without calling the model."""
+        cache, _ = make_cache({})
+        calls = []
+
+        first = await cache.get_or_compute("k", completion("a", calls))
+        second = await cache.get_or_compute("k", completion("b", calls))
+
+        assert first == second == "a"
+        assert calls == ["a"]
+        assert cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_semantic_hit_for_near_duplicate_request(self):
+        """A close enough request reuses the cached completion."""
+        cache, _ = make_cache(
+            {"weather in Lisbon": unit(1, 0.01), "Lisbon weather": unit(1, 0.02)}
+        )
+        calls = []
+
+        await cache.get_or_compute(
+            "k1", completion("plan", calls), text="weather in Lisbon", scope="s"
+        )
+        result = await cache.get_or_compute(
+            "k2", completion("other", calls), text="Lisbon weather", scope="s"
+        )
+
+        assert result == "plan"
+        assert calls == ["plan"]
+        assert cache.stats()["semantic_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_dissimilar_request_misses(self):
+        """Requests below the similarity threshold are computed."""
+        cache, _ = make_cache({"a": unit(1, 0), "b": unit(0, 1)})
+        calls = []
+
+        await cache.get_or_compute("k1", completion("a", calls), text="a", scope="s")
+        result = await cache.get_or_compute(
+            "k2", completion("b", calls), text="b", scope="s"
+        )
+
+        assert result == "b"
+        assert calls == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_scopes_are_isolated(self):
+        """Near matches never cross model/temperature scopes."""
+        cache, _ = make_cache({"a": unit(1)})
+        calls = []
+
+        await cache.get_or_compute(
+            "k1", completion("x", calls), text="a", scope="m:0.1"
+        )
+        result = await cache.get_or_compute(
+            "k2", completion("y", calls), text="a", scope="m:0.0"
+        )
+
+        assert result == "y"
+
+    @pytest.mark.asyncio
+    async def test_without_text_only_exact_hits(self):
+        """Calls without ``text`` are neither embedded nor near-matched."""
+        cache, embeddings = make_cache({"a": unit(1)})
+        calls = []
+
+        await cache.get_or_compute("k1", completion("x", calls), text="a", scope="s")
+        result = await cache.get_or_compute("k2", completion("y", calls), scope="s")
+
+        assert result == "y"
+        assert embeddings.calls == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_falls_back_to_completion(self):
+        """A failing embeddings call only skips the semantic tier."""
+        cache, _ = make_cache({})
+        calls = []
+
+        result = await cache.get_or_compute(
+            "k", completion("x", calls), text="unknown", scope="s"
+        )
+
+        assert result == "x"
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_response_is_not_served_semantically(self):
+        """A vector whose response expired does not match."""
+        cache, _ = make_cache({"a": unit(1)})
+        calls = []
+
+        await cache.get_or_compute("k1", completion("x", calls), text="a", scope="s")
+        cache._responses.clear()
+        result = await cache.get_or_compute(
+            "k2", completion("y", calls), text="a", scope="s"
+        )
+
+        assert result == "y"
+
+    @pytest.mark.asyncio
+    async def test_vectors_wrap_at_maxsize(self):
+        """The vector matrix is a ring buffer of ``maxsize`` slots."""
+        vectors = {f"t{i}": unit(*([0] * i), 1) for i in range(3)}
+        cache, _ = make_cache(vectors, maxsize=2)
+        calls = []
+
+        for i in range(3):
+            await cache.get_or_compute(
+                f"k{i}", completion(f"r{i}", calls), text=f"t{i}", scope="s"
+            )
+
+        assert cache._slot_keys == ["k2", "k1"]
@@ -0,0 +1,162 @@
+"""
+Tests for the simple database's background audit writer
+(anzen_gateway.simple_database).
+"""
+
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from anzen_gateway.simple_database import (
+    AuditLog,
+    SimpleAuditWriter,
+    SimpleDatabaseManager,
+    get_simple_audit_writer,
+    get_simple_compliance_report,
+    log_simple_audit,
+)
+
+
+@pytest.fixture(params=["memory", "file"])
+def manager(request, tmp_path):
+    """A simple database with its tables, in memory or on disk."""
+    if request.param == "memory":
+        url = "sqlite:///:memory:"
+    else:
+        url = f"sqlite:///{tmp_path / 'simple.db'}"
+    manager = SimpleDatabaseManager(url)
+    manager.create_tables()
+    yield manager
+    manager.close()
+
+
+def audit_row(trace_id, decision="ALLOW"):
+    return {
+        "public_id": str(uuid.uuid4()),
+        "trace_id": trace_id,
+        "organization_id": 1,
+        "route": "public:chat",
+        "method": "input",
+        "entity_count": 0,
+        "entity_type_counts": {},
+        "risk_level": "low",
+        "decision": decision,
+        "input_hash": bytes(32),
+        "text_length": 5,
+        "processing_time_ms": 1.0,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def stored_trace_ids(manager):
+    with manager.session_scope() as session:
+        return sorted(session.execute(select(AuditLog.trace_id)).scalars())
+
+
+def log(db, trace_id, decision="ALLOW", risk_level="low", entities=()):
+    return log_simple_audit(
+        db,
+        trace_id=trace_id,
+        organization_id=1,
+        route="public:chat",
+        method="input",
+        text="hello",
+        entities=list(entities),
+        risk_level=risk_level,
+        decision=decision,
+        processing_time=1.5,
+    )
+
+
+class TestSimpleAuditWriter:
+    """Test the threaded batch writer and the logging helper."""
+
+    def test_logs_reach_the_database(self, manager):
+        """Queued logs are visible once flushed, including in memory."""
+        with manager.session_scope() as db:
+            log(db, "t1")
+            log(db, "t2", decision="BLOCK", risk_level="HIGH")
+        get_simple_audit_writer(manager.engine).flush()
+
+        assert stored_trace_ids(manager) == ["t1", "t2"]
+
+    def test_returned_log_uses_canonical_names(self, manager):
+        """Decision and risk level come back as the columns read them."""
+        with manager.session_scope() as db:
+            entry = log(db, "t1", decision="redact", risk_level="Medium")
+
+        assert (entry.decision, entry.risk_level) == ("REDACT", "medium")
+
+    @pytest.mark.parametrize(
+        "decision, risk_level", [("ALLOW", "critical"), ("MAYBE", "low")]
+    )
+    def test_rejects_unknown_values_before_queueing(
+        self, manager, decision, risk_level
+    ):
+        """Invalid values raise to the caller and nothing is queued."""
+        with manager.session_scope() as db:
+            with pytest.raises(ValueError):
+                log(db, "bad", decision=decision, risk_level=risk_level)
+            log(db, "good")
+        get_simple_audit_writer(manager.engine).flush()
+
+        assert stored_trace_ids(manager) == ["good"]
+
+    def test_bad_row_only_loses_itself(self, manager):
+        """A failed batch is retried row by row."""
+        writer = SimpleAuditWriter(manager.engine, flush_interval=10)
+        for i in range(5):
+            row = audit_row(f"t{i}")
+            if i == 2:
+                row["trace_id"] = None  # violates NOT NULL
+            writer.submit(row)
+        writer.close()
+
+        assert stored_trace_ids(manager) == ["t0", "t1", "t3", "t4"]
+
+    def test_drops_rows_when_full(self, manager):
+        """Submissions beyond ``maxsize`` are dropped, not buffered."""
+        writer = SimpleAuditWriter(manager.engine, flush_interval=10, maxsize=2)
+        for i in range(3):
+            writer.submit(audit_row(f"t{i}"))
+        writer.close()
+
+        assert stored_trace_ids(manager) == ["t0", "t1"]
+
+    def test_submit_after_close_inserts_directly(self, manager):
+        """Late rows (e.g. during shutdown) are written synchronously."""
+        writer = SimpleAuditWriter(manager.engine)
+        writer.close()
+
+        writer.submit(audit_row("late"))
+
+        assert stored_trace_ids(manager) == ["late"]
+
+    def test_staleness(self, manager):
+        """Staleness is zero once everything queued has been written."""
+        writer = SimpleAuditWriter(manager.engine, flush_interval=10)
+        writer.submit(audit_row("t1"))
+        assert writer.staleness_seconds() >= 0
+
+        writer.close()
+        assert writer.staleness_seconds() == 0
+
+    def test_report_counts_flushed_logs(self, manager):
+        """Summary counts are maintained in the same batch as the logs."""
+        with manager.session_scope() as db:
+            log(db, "t1", entities=[{"type": "EMAIL_ADDRESS"}])
+            log(db, "t2", decision="BLOCK", risk_level="high")
+            log(db, "t3", decision="REDACT", risk_level="medium")
+        get_simple_audit_writer(manager.engine).flush()
+
+        with manager.session_scope() as db:
+            report = get_simple_compliance_report(db, 1)
+            count = db.scalar(select(func.count()).select_from(AuditLog))
+
+        assert count == 3
+        assert report["summary"]["total_requests"] == 3
+        assert report["summary"]["blocked_requests"] == 1
+        assert report["summary"]["redacted_requests"] == 1
+        assert report["by_entity_type"] == {"EMAIL_ADDRESS": 1}
@@ -0,0 +1,131 @@
+"""
+Tests for the incremental plan parser (anzen_agent.stream_json).
+"""
+
+import orjson
+import pytest
+
+from anzen_agent.stream_json import StreamJSON
+
+PLAN = {
+    "steps": [
+        {"step": 1, "action": "search_wikipedia", "description": "Look up Lisbon"},
+        {"step": 2, "action": "get_weather", "description": "Weather in Lisbon"},
+        {"step": 3, "action": "synthesize", "description": "Combine the results"},
+    ],
+    "estimated_time": 30,
+    "complexity": "low",
+}
+
+
+def feed(parser, text, size):
+    """Push ``text`` in ``size``-character chunks, collecting emitted elements."""
+    emitted = []
+    for i in range(0, len(text), size):
+        emitted.extend(parser.push(text[i : i + size]))
+    return emitted
+
+
+class TestStreamJSON:
+    """Test element extraction from streamed JSON."""
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+    def test_emits_each_step_once_in_order(self, size):
+        """Steps come out whole and in order however the text is chunked."""
+        text = orjson.dumps(PLAN).decode()
+        parser = StreamJSON()
+
+        assert feed(parser, text, size) == PLAN["steps"]
+        assert parser.get() == PLAN
+
+    def test_emits_step_as_soon_as_it_closes(self):
+        """A step is returned by the push that completes it, not later."""
+        parser = StreamJSON()
+
+        assert parser.push('{"steps": [{"step": 1, "action": "a"') == []
+        assert parser.push('}, {"step": 2') == [{"step": 1, "action": "a"}]
+        assert parser.push(', "action": "b"}]') == [{"step": 2, "action": "b"}]
+
+    def test_chunks_splitting_strings_and_escapes(self):
+        """Braces, brackets and quotes inside strings are not structure."""
+        description = 'Say "hi" {not an object} [nor an array] \\ done'
+        plan = {"steps": [{"step": 1, "description": description}]}
+        text = orjson.dumps(plan).decode()
+        parser = StreamJSON()
+
+        # One character at a time splits every escape sequence
+        assert feed(parser, text, 1) == plan["steps"]
+        assert parser.get() == plan
+
+    def test_escaped_backslash_before_closing_quote(self):
+        """A string ending in an escaped backslash still closes."""
+        parser = StreamJSON()
+
+        assert parser.push('{"steps": [{"path": "C:\\\\') == []
+        assert parser.push('"}]}') == [{"path": "C:\\"}]
+
+    def test_nested_values_inside_steps(self):
+        """Objects and arrays nested in a step stay part of that step."""
+        plan = {
+            "steps": [
+                {"step": 1, "args": {"cities": ["Lisbon", {"name": "Porto"}]}},
+                {"step": 2, "args": [[1, 2], {"deep": {"deeper": []}}]},
+            ]
+        }
+        parser = StreamJSON()
+
+        assert feed(parser, orjson.dumps(plan).decode(), 5) == plan["steps"]
+
+    def test_only_top_level_array_key_is_streamed(self):
+        """A nested member with the same name is not mistaken for the plan."""
+        doc = {
+            "meta": {"steps": [{"ignored": True}]},
+            "notes": [{"steps": [{"ignored": True}]}],
+            "steps": [{"step": 1}],
+        }
+        parser = StreamJSON()
+
+        assert feed(parser, orjson.dumps(doc).decode(), 4) == [{"step": 1}]
+
+    def test_custom_array_key(self):
+        """Any top-level array member can be streamed."""
+        parser = StreamJSON(array_key="items")
+
+        emitted = parser.push('{"steps": [{"a": 1}], "items": [{"b": 2}]}')
+
+        assert emitted == [{"b": 2}]
+
+    def test_truncated_stream(self):
+        """Complete steps are kept; the document itself does not parse."""
+        text = orjson.dumps(PLAN).decode()
+        cut = text.index('{"step":3')
+        parser = StreamJSON()
+
+        emitted = feed(parser, text[: cut + 20], 3)
+
+        assert emitted == PLAN["steps"][:2]
+        with pytest.raises(orjson.JSONDecodeError):
+            parser.get()
+
+    def test_malformed_step(self):
+        """A step that closes but is not valid JSON raises from push."""
+        parser = StreamJSON()
+
+        with pytest.raises(orjson.JSONDecodeError):
+            parser.push('{"steps": [{"step": 1,}]}')
+
+    def test_malformed_document(self):
+        """Text that is not JSON emits nothing and fails on get."""
+        parser = StreamJSON()
+
+        assert parser.push("Sure! Here is your plan: steps 1, 2, 3") == []
+        with pytest.raises(orjson.JSONDecodeError):
+            parser.get()
+
+    def test_consumed(self):
+        """``consumed`` tells a streamed parse from a cache hit."""
+        parser = StreamJSON()
+        assert not parser.consumed
+
+        parser.push("{")
+        assert parser.consumed